@@ -10,22 +10,33 @@ YueYingCheJiBot - AI Integration
 5. check_anti_fraud(text)     — 反诈检测：识别高危关键词
 
 支持 Grok / 通义千问 双后端，无 AI Key 时降级为规则模式。
+意图解析结果按规范化查询缓存（进程内 LRU + 可选 PostgreSQL 共享第二级），
+命中时不调用 LLM。
 """
 
+import asyncio
+import copy
+import hashlib
 import os
 import re
 import json
 import logging
+import unicodedata
 from datetime import datetime
 from typing import Optional
 
 import aiohttp
 
-from models import (
+import jsoncodec
+from cache import MISSING, TTLCache
+from http_client import http_client
+from storage import (
     get_lanterns_multi_filter,
     get_high_trust_lanterns,
     get_approved_lanterns,
+    get_cached_intent,
     log_metric,
+    save_cached_intent,
 )
 from credit import get_match_multiplier
 
@@ -42,7 +53,15 @@ AI_API_KEY = GROK_API_KEY or TONGYI_API_KEY
 AI_ENDPOINT = GROK_ENDPOINT if GROK_API_KEY else TONGYI_ENDPOINT
 AI_MODEL = "grok-3-mini" if GROK_API_KEY else "qwen-turbo"
 
+# --- 意图缓存 ---
+# TTL（秒）、进程内最大条目数；INTENT_CACHE_SHARED=0 时不使用 PostgreSQL 共享第二级
+INTENT_CACHE_TTL = float(os.environ.get("INTENT_CACHE_TTL", "3600"))
+INTENT_CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", "5000"))
+INTENT_CACHE_SHARED = os.environ.get("INTENT_CACHE_SHARED", "1") != "0"
+
 # --- 知识库常量 ---
+# 举报人数达到该值视为高风险：城市召回在 SQL 中直接排除，兜底召回时排到末尾
+REPORT_RISK_THRESHOLD = 3
 KNOWN_CITIES = ["台北", "香港", "深圳", "上海", "广州", "高雄", "台中", "新竹"]
 KNOWN_TYPES = ["大学生", "KH", "兼职", "全职", "外籍", "熟女"]
 
@@ -84,17 +103,16 @@ async def _call_ai(messages: list, temperature: float = 0.3, max_tokens: int = 1
         "Content-Type": "application/json",
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            AI_ENDPOINT, json=payload, headers=headers,
-            timeout=aiohttp.ClientTimeout(total=30),
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            choices = data.get("choices")
-            if not choices or not isinstance(choices, list):
-                raise ValueError(f"Unexpected AI response format: {data}")
-            return choices[0]["message"]["content"].strip()
+    async with http_client.session().post(
+        AI_ENDPOINT, json=payload, headers=headers,
+        timeout=aiohttp.ClientTimeout(total=30),
+    ) as resp:
+        resp.raise_for_status()
+        data = await resp.json(loads=jsoncodec.loads)
+    choices = data.get("choices")
+    if not choices or not isinstance(choices, list):
+        raise ValueError(f"Unexpected AI response format: {data}")
+    return choices[0]["message"]["content"].strip()
 
 
 # =============================================================================
@@ -136,42 +154,104 @@ def _rule_parse_intent(query: str) -> dict:
     }
 
 
+_INTENT_SYSTEM_PROMPT = (
+    "你是月影车姬的意图解析引擎。将用户的自然语言需求解析为如下 JSON，只返回 JSON，不要其他内容：\n"
+    '{"city":"城市名或空字符串","type":"资源类型或空字符串","budget_min":数字或null,'
+    '"budget_max":数字或null,"need_real_photos":true或false,"time_hint":"时间描述或空字符串",'
+    '"missing_slots":["city"等缺失的必要槽位列表"]}\n'
+    f"可选城市：{KNOWN_CITIES}\n可选类型：{KNOWN_TYPES}\n"
+    "预算单位为整数（台币/港币/人民币）；若用户提供了城市则 missing_slots 不含 city。"
+)
+# 提示词版本：提示词（含 KNOWN_CITIES / KNOWN_TYPES）的摘要，改动后共享缓存自动失效
+_INTENT_PROMPT_VERSION = hashlib.sha256(_INTENT_SYSTEM_PROMPT.encode()).hexdigest()[:16]
+
+# 意图缓存：键为规范化查询（NFKC 全角转半角、大小写折叠、空白合并），
+# 规范化只用于缓存寻址，发给 LLM 的仍是用户原文；
+# 只缓存 LLM 成功解析的结果，规则降级结果不缓存。
+intent_cache = TTLCache(maxsize=INTENT_CACHE_SIZE, ttl=INTENT_CACHE_TTL)
+_intent_stats = {"llm_calls": 0, "shared_hits": 0, "shared_misses": 0, "shared_failed": 0}
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询文本：全角 → 半角、大小写折叠、连续空白合并为单个空格。"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+def _intent_hash(key: str) -> str:
+    """共享缓存键：模型名 + 提示词版本 + 规范化查询的 sha256（换模型或改提示词后不复用旧结果）。"""
+    return hashlib.sha256(f"{AI_MODEL}\n{_INTENT_PROMPT_VERSION}\n{key}".encode()).hexdigest()
+
+
+async def _cached_intent(key: str) -> Optional[dict]:
+    """依次查进程内缓存与共享缓存，未命中返回 None；共享缓存故障时视为未命中。"""
+    intent = intent_cache.get(key)
+    if intent is MISSING:
+        if not INTENT_CACHE_SHARED:
+            return None
+        try:
+            intent = await get_cached_intent(_intent_hash(key))
+        except Exception as e:
+            _intent_stats["shared_failed"] += 1
+            logger.warning("读取共享意图缓存失败: %s", e)
+            return None
+        if intent is None:
+            _intent_stats["shared_misses"] += 1
+            return None
+        _intent_stats["shared_hits"] += 1
+        intent_cache.set(key, intent)
+    return copy.deepcopy(intent)
+
+
+async def _remember_intent(key: str, intent: dict):
+    intent_cache.set(key, copy.deepcopy(intent))
+    if INTENT_CACHE_SHARED:
+        try:
+            await save_cached_intent(_intent_hash(key), intent, INTENT_CACHE_TTL)
+        except Exception as e:
+            _intent_stats["shared_failed"] += 1
+            logger.warning("写入共享意图缓存失败: %s", e)
+
+
+def intent_cache_stats() -> dict:
+    """意图缓存命中率（进程内 + 共享第二级）与 LLM 调用次数，供管理员命令查看。"""
+    return {**intent_cache.stats(), **_intent_stats, "shared": INTENT_CACHE_SHARED}
+
+
 async def parse_query_intent(query: str) -> dict:
     """
     NLU：将用户自然语言解析为结构化槽位。
-    有 AI 时调用 LLM，否则降级为规则解析。
+    有 AI 时以原文调用 LLM（结果按规范化查询缓存），否则降级为规则解析。
     返回: {city, type, budget_min, budget_max, need_real_photos, time_hint, missing_slots}
     """
     if not AI_API_KEY:
         return _rule_parse_intent(query)
 
-    system_prompt = (
-        "你是月影车姬的意图解析引擎。将用户的自然语言需求解析为如下 JSON，只返回 JSON，不要其他内容：\n"
-        '{"city":"城市名或空字符串","type":"资源类型或空字符串","budget_min":数字或null,'
-        '"budget_max":数字或null,"need_real_photos":true或false,"time_hint":"时间描述或空字符串",'
-        '"missing_slots":["city"等缺失的必要槽位列表"]}\n'
-        f"可选城市：{KNOWN_CITIES}\n可选类型：{KNOWN_TYPES}\n"
-        "预算单位为整数（台币/港币/人民币）；若用户提供了城市则 missing_slots 不含 city。"
-    )
+    key = normalize_query(query)
+    cached = await _cached_intent(key)
+    if cached is not None:
+        return cached
+
     try:
+        _intent_stats["llm_calls"] += 1
         raw = await _call_ai(
             [
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _INTENT_SYSTEM_PROMPT},
                 {"role": "user", "content": query},
             ],
             temperature=0.1,
             max_tokens=256,
         )
         intent = json.loads(raw)
-        for key, default in [
+        for slot, default in [
             ("city", ""), ("type", ""), ("budget_min", None), ("budget_max", None),
             ("need_real_photos", False), ("time_hint", ""), ("missing_slots", []),
         ]:
-            intent.setdefault(key, default)
-        return intent
+            intent.setdefault(slot, default)
     except Exception as e:
         logger.warning("NLU 解析失败，降级为规则模式: %s", e)
         return _rule_parse_intent(query)
+    await _remember_intent(key, intent)
+    return intent
 
 
 # =============================================================================
@@ -190,6 +270,11 @@ def check_anti_fraud(text: str) -> list:
 # 3. 规则评分（Stage 1）
 # =============================================================================
 
+def _report_count(lantern: dict) -> int:
+    """举报人数：摘要与完整文档均带冗余计数 report_count。"""
+    return lantern.get("report_count", 0)
+
+
 def _compute_rule_score(lantern: dict, owner_credit: int = 100) -> float:
     """
     综合真实度、举报数、时效性、灯笼主信用分计算规则基础分（0-100）。
@@ -197,7 +282,7 @@ def _compute_rule_score(lantern: dict, owner_credit: int = 100) -> float:
     auth_score = float(lantern.get("authenticity_score") or 50.0)
     auth_factor = auth_score / 100.0
 
-    reports_count = len(lantern.get("reports", []))
+    reports_count = _report_count(lantern)
     report_factor = max(0.0, 1.0 - reports_count / 5.0)
 
     submitted_at = lantern.get("submitted_at")
@@ -328,12 +413,16 @@ async def match_lanterns(
     is_cold_start = False
 
     if city:
-        candidates = await get_lanterns_multi_filter(city=city, resource_type=resource_type, limit=50)
+        candidates = await get_lanterns_multi_filter(
+            city=city, resource_type=resource_type, limit=50, max_reports=REPORT_RISK_THRESHOLD
+        )
 
     # 周边城市回退
     if not candidates and city:
         for nearby in NEARBY_CITIES.get(city, []):
-            candidates = await get_lanterns_multi_filter(city=nearby, resource_type=resource_type, limit=30)
+            candidates = await get_lanterns_multi_filter(
+                city=nearby, resource_type=resource_type, limit=30, max_reports=REPORT_RISK_THRESHOLD
+            )
             if candidates:
                 break
 
@@ -372,7 +461,7 @@ async def match_lanterns(
         key=lambda l: (
             0 if (
                 (l.get("authenticity_score") or 50) < 30
-                or len(l.get("reports", [])) >= 3
+                or _report_count(l) >= REPORT_RISK_THRESHOLD
             ) else 1,
             l["_rule_score"],
         ),
@@ -418,6 +507,18 @@ async def match_lanterns(
 # 6. 兰花鉴真（照片真实度分析）
 # =============================================================================
 
+async def _photo_url(bot_token: str, file_id: str) -> str:
+    """通过 Telegram getFile 换取照片下载链接，失败时返回空串。"""
+    try:
+        url = f"https://api.telegram.org/bot{bot_token}/getFile?file_id={file_id}"
+        async with http_client.session().get(url) as resp:
+            data = await resp.json(loads=jsoncodec.loads)
+        return f"https://api.telegram.org/file/bot{bot_token}/{data['result']['file_path']}"
+    except Exception as e:
+        logger.warning("获取照片链接失败 %s: %s", file_id, e)
+        return ""
+
+
 async def analyze_authenticity(photo_file_ids: list) -> dict:
     """
     兰花鉴真：分析照片真实度。
@@ -437,17 +538,8 @@ async def analyze_authenticity(photo_file_ids: list) -> dict:
     bot_token = os.environ.get("BOT_TOKEN", "")
     photo_descriptions = []
     if bot_token:
-        async with aiohttp.ClientSession() as session:
-            for file_id in photo_file_ids[:3]:
-                try:
-                    url = f"https://api.telegram.org/bot{bot_token}/getFile?file_id={file_id}"
-                    async with session.get(url) as resp:
-                        data = await resp.json()
-                        file_path = data["result"]["file_path"]
-                    photo_url = f"https://api.telegram.org/file/bot{bot_token}/{file_path}"
-                    photo_descriptions.append(f"照片链接：{photo_url}")
-                except Exception as e:
-                    logger.warning("获取照片链接失败 %s: %s", file_id, e)
+        urls = await asyncio.gather(*(_photo_url(bot_token, fid) for fid in photo_file_ids[:3]))
+        photo_descriptions = [f"照片链接：{url}" for url in urls if url]
 
     if not photo_descriptions:
         photo_descriptions = [f"共 {len(photo_file_ids)} 张照片（无法获取链接）"]
@@ -15,11 +15,12 @@ import asyncio
 import logging
 import os
 from datetime import datetime
+from html import escape
 
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.filters import Command, CommandStart
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.storage.base import StorageKey
@@ -33,24 +34,28 @@ from aiogram.types import (
     WebAppInfo,
 )
 
-from models import (
-    create_indexes,
+from models import create_indexes, get_runtime_stats, MODERATION_LEASE_MINUTES
+from http_client import http_client
+from storage import (
     get_or_create_user,
+    get_credit_score,
     update_credit,
     collect_lantern,
     create_lantern,
-    approve_lantern,
-    reject_lantern,
     report_lantern,
-    get_pending_lanterns,
+    get_lantern_reports,
+    get_reported_lanterns,
+    claim_moderation_batch,
+    release_moderation_claims,
+    moderate_lanterns,
+    moderate_claimed_batch,
     create_anonymous_chat,
     get_chat_by_id,
     append_message,
+    get_recent_chat_messages,
     mark_photo_shared,
     end_chat_naturally,
     rate_session,
-    record_action_timestamp,
-    get_action_timestamps,
     log_behavior,
     log_metric,
     save_user_preferences,
@@ -63,25 +68,37 @@ from models import (
     accept_chat_request,
     decline_chat_request,
     get_lantern_by_id,
+    get_collection_page,
     get_lantern_by_prefix,
     update_lantern_fields,
     get_or_create_group_settings,
     get_group_settings,
     update_group_settings,
+    get_metric_totals,
+    unit_of_work,
+    storage_stats,
 )
-from ai import match_lanterns, analyze_authenticity, score_session_quality, check_anti_fraud
+from middlewares import acting_user_middleware, unit_of_work_middleware
+from ai import (
+    analyze_authenticity,
+    check_anti_fraud,
+    intent_cache_stats,
+    match_lanterns,
+    score_session_quality,
+)
+from ratelimit import rate_limiter
 from credit import (
     get_credit_tier,
     get_eclipse_level,
     has_restriction,
     eclipse_message,
-    check_rate_limit,
     detect_session_gaming,
     calculate_session_credit,
     format_session_credit_summary,
     assign_recovery_tasks,
     format_credit_report,
     format_tier_badge,
+    RATE_LIMITS,
     RATE_LIMIT_PENALTY,
 )
 
@@ -104,6 +121,10 @@ bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 storage = MemoryStorage()
 dp = Dispatcher(storage=storage)
 router = Router()
+# 操作用户（只读副本的读己之写判断）；每次更新的耗时与签出数统计（按是否开启工作单元分组）
+for observer in (router.message, router.callback_query):
+    observer.middleware(acting_user_middleware)
+    observer.middleware(unit_of_work_middleware)
 dp.include_router(router)
 
 # 缓存 bot_id（首次 get_me 后填充）
@@ -220,8 +241,7 @@ async def _check_eclipse(user_id: int, restriction: str, target) -> bool:
     检查遮蔽限制。受限则发送提示并返回 True（调用方应 return）。
     target: Message 或 CallbackQuery。
     """
-    user = await get_or_create_user(user_id)
-    score = user.get("credit_score", 100)
+    score = await get_credit_score(user_id)
     if not has_restriction(score, restriction):
         return False
 
@@ -236,16 +256,14 @@ async def _check_eclipse(user_id: int, restriction: str, target) -> bool:
 
 async def _check_rate_limit(user_id: int, action_type: str, target) -> bool:
     """
-    检查速率限制。超限则发提示、扣分并返回 True。
+    检查速率限制（检查与记录为同一原子操作）。超限则发提示、扣分并返回 True。
     """
-    timestamps = await get_action_timestamps(user_id, action_type)
-    allowed, remaining = check_rate_limit(timestamps, action_type)
+    allowed, _ = await rate_limiter.hit(user_id, action_type)
     if allowed:
-        await record_action_timestamp(user_id, action_type)
         return False
 
-    from credit import RATE_LIMITS
     cfg = RATE_LIMITS.get(action_type, {})
+
     msg = (
         f"⚡ <b>月影节流提醒</b>\n\n"
         f"你在 {cfg.get('window_hours', 24)} 小时内操作过于频繁（{cfg.get('label', '')}）。\n"
@@ -265,8 +283,7 @@ async def _check_rate_limit(user_id: int, action_type: str, target) -> bool:
 
 async def _apply_eclipse_if_needed(user_id: int):
     """若信用分进入遮蔽区间，自动分配修行任务。"""
-    user = await get_or_create_user(user_id)
-    score = user.get("credit_score", 100)
+    score = await get_credit_score(user_id)
     tasks = assign_recovery_tasks(score)
     if tasks:
         await assign_recovery_tasks_to_user(user_id, tasks)
@@ -328,15 +345,15 @@ def _result_actions_keyboard(results: list) -> InlineKeyboardMarkup:
 
 @router.message(CommandStart())
 async def cmd_start(message: Message):
-    user = await get_or_create_user(
-        user_id=message.from_user.id,
-        username=message.from_user.username or "",
-        full_name=message.from_user.full_name or "",
-    )
+    # 建档与日常无违规恢复在同一事务内完成，提交后再回复
+    async with unit_of_work():
+        user = await get_or_create_user(
+            user_id=message.from_user.id,
+            username=message.from_user.username or "",
+            full_name=message.from_user.full_name or "",
+        )
+        recovered = await try_daily_recovery(message.from_user.id)
     credit = user.get("credit_score", 100)
-
-    # 日常无违规恢复
-    recovered = await try_daily_recovery(message.from_user.id)
     recovery_note = f"\n🌱 今日恢复 <b>+{recovered}</b> 兰花令" if recovered else ""
 
     badge = format_tier_badge(credit)
@@ -425,8 +442,9 @@ async def cmd_menu(message: Message):
 @router.message(Command("credit"))
 async def cmd_credit_command(message: Message):
     user_id = message.from_user.id
-    recovered = await try_daily_recovery(user_id)
-    user = await get_or_create_user(user_id)
+    async with unit_of_work():
+        recovered = await try_daily_recovery(user_id)
+        user = await get_or_create_user(user_id)
     report = format_credit_report(user)
     recovery_note = f"\n🌱 今日恢复 <b>+{recovered}</b> 兰花令" if recovered else ""
     await message.answer(
@@ -596,7 +614,9 @@ async def handle_city_followup(message: Message, state: FSMContext):
 async def cb_collect(callback: CallbackQuery):
     await callback.answer()
     lantern_id = callback.data.split(":", 1)[1]
-    await collect_lantern(callback.from_user.id, lantern_id)
+    if not await collect_lantern(callback.from_user.id, lantern_id):
+        await callback.message.answer("🕰 这盏灯笼已在你的时光秘匣中。")
+        return
     await log_behavior(callback.from_user.id, "collect", lantern_id)
     await callback.message.answer("🕰 已收藏到你的时光秘匣！")
 
@@ -721,13 +741,12 @@ async def _async_analyze(lantern_id: str, photo_file_ids: list):
         if needs_review:
             fields["needs_human_review"] = True
 
-        await update_lantern_fields(lantern_id, fields)
+        lantern = await update_lantern_fields(lantern_id, fields)
         logger.info("灯笼 %s 鉴真评分：%.1f | 标签：%s | 需人工：%s",
                     lantern_id, score, labels, needs_review)
 
         # 若真实度极低，扣除投稿者信用
         if score < 40:
-            lantern = await get_lantern_by_id(lantern_id)
             if lantern and lantern.get("submitted_by"):
                 uid = lantern["submitted_by"]
                 await update_credit(uid, -20, "照片鉴真不合格")
@@ -747,10 +766,10 @@ async def cb_credit(callback: CallbackQuery):
     await callback.answer()
     user_id = callback.from_user.id
 
-    # 日常恢复
-    recovered = await try_daily_recovery(user_id)
-
-    user = await get_or_create_user(user_id)
+    # 日常恢复与读取在同一事务内完成，提交后再回复
+    async with unit_of_work():
+        recovered = await try_daily_recovery(user_id)
+        user = await get_or_create_user(user_id)
     report = format_credit_report(user)
 
     recovery_note = f"\n🌱 今日恢复 <b>+{recovered}</b> 兰花令" if recovered else ""
@@ -764,13 +783,31 @@ async def cb_credit(callback: CallbackQuery):
 # 时光秘匣
 # ---------------------------------------------------------------------------
 
+COLLECTION_PAGE_SIZE = 10
+
+
 @router.callback_query(F.data == "cmd:collection")
 async def cb_collection(callback: CallbackQuery):
     await callback.answer()
-    user = await get_or_create_user(callback.from_user.id)
-    collected = user.get("collected_lanterns", [])
+    await _send_collection_page(callback)
+
 
-    if not collected:
+@router.callback_query(F.data.startswith("collection:"))
+async def cb_collection_page(callback: CallbackQuery):
+    """时光秘匣翻页（callback_data 携带游标）。"""
+    await callback.answer()
+    await _send_collection_page(callback, callback.data.split(":", 1)[1])
+
+
+async def _send_collection_page(callback: CallbackQuery, cursor: str = None):
+    try:
+        page = await get_collection_page(
+            callback.from_user.id, cursor=cursor, limit=COLLECTION_PAGE_SIZE
+        )
+    except ValueError:
+        page = await get_collection_page(callback.from_user.id, limit=COLLECTION_PAGE_SIZE)
+
+    if not page["total"]:
         await callback.message.answer(
             "🕰 <b>你的时光秘匣是空的。</b>\n\n"
             "在秘境中找到心仪的灯笼后，点击「收藏」即可存入秘匣。",
@@ -778,11 +815,11 @@ async def cb_collection(callback: CallbackQuery):
         )
         return
 
-    text = f"🕰 <b>你的时光秘匣（共 {len(collected)} 盏灯笼）</b>\n\n"
-    display_ids = collected[:10]
+    text = f"🕰 <b>你的时光秘匣（共 {page['total']} 盏灯笼）</b>\n\n"
+    lanterns = {l["lantern_id"]: l for l in page["items"]}
     rows = []
-    for i, lid in enumerate(display_ids, 1):
-        lantern = await get_lantern_by_id(lid)
+    for i, lid in enumerate(page["ids"], page["offset"] + 1):
+        lantern = lanterns.get(lid)
         if lantern:
             auth_val = lantern.get("authenticity_score")
             auth_str = f" | 真实度 {auth_val:.0f}%" if auth_val is not None else ""
@@ -799,8 +836,14 @@ async def cb_collection(callback: CallbackQuery):
         else:
             text += f"{i}. <code>{lid[:8]}…</code>（灯笼已失效）\n\n"
 
-    if len(collected) > 10:
-        text += f"…及其他 {len(collected) - 10} 盏\n"
+    if page["next_cursor"]:
+        remaining = page["total"] - page["offset"] - len(page["ids"])
+        text += f"…及其他 {remaining} 盏\n"
+        rows.append([
+            InlineKeyboardButton(
+                text="➡️ 下一页", callback_data=f"collection:{page['next_cursor']}"
+            ),
+        ])
 
     rows.append([InlineKeyboardButton(text="🔙 返回主菜单", callback_data="menu:back")])
     kb = InlineKeyboardMarkup(inline_keyboard=rows)
@@ -890,7 +933,19 @@ async def report_enter_reason(message: Message, state: FSMContext):
     await state.clear()
 
     full_id = data.get("lantern_id", "")
-    await report_lantern(full_id, message.from_user.id, reason)
+    added = await report_lantern(full_id, message.from_user.id, reason)
+    if added is None:
+        await message.answer(
+            "🔍 这盏灯笼已不存在（可能已被删除），无需再举报。",
+            reply_markup=main_menu_keyboard(),
+        )
+        return
+    if not added:
+        await message.answer(
+            "🕯 你已举报过这盏灯笼，管理员会一并核实。",
+            reply_markup=main_menu_keyboard(),
+        )
+        return
     await log_behavior(message.from_user.id, "report", full_id, metadata={"reason": reason})
     await log_metric("lantern_reported", {
         "reporter": message.from_user.id,
@@ -1155,7 +1210,7 @@ async def cb_rate_session(callback: CallbackQuery, state: FSMContext):
     user1, user2 = session["user1"], session["user2"]
     r1 = ratings.get(str(user1), {}).get("stars", 3)
     r2 = ratings.get(str(user2), {}).get("stars", 3)
-    messages = session.get("messages", [])
+    message_count = session.get("message_count", 0)
     created_at = session.get("created_at", datetime.utcnow())
     ended_at = session.get("ended_at", datetime.utcnow())
     duration_minutes = max(0, (ended_at - created_at).total_seconds() / 60)
@@ -1167,45 +1222,50 @@ async def cb_rate_session(callback: CallbackQuery, state: FSMContext):
     one_photo = u1_photo or u2_photo
     completed_naturally = session.get("completed_naturally", False)
 
-    # AI 质量评分
-    ai_quality = await score_session_quality(messages)
+    # AI 质量评分（只需最近 30 条消息）
+    recent_messages = await get_recent_chat_messages(chat_id, limit=30)
+    ai_quality = await score_session_quality(recent_messages)
 
     # 刷分检测
     gaming = detect_session_gaming(
-        duration_minutes, len(messages), r1, r2
+        duration_minutes, message_count, r1, r2
     )
 
-    # 分别结算
-    for uid, my_rating, their_rating in [(user1, r2, r1), (user2, r1, r2)]:
-        delta, breakdown = calculate_session_credit(
-            rating_received=their_rating,
-            duration_minutes=duration_minutes,
-            photos_both_shared=both_photos,
-            photo_one_shared=one_photo,
-            completed_naturally=completed_naturally,
-            ai_quality_score=ai_quality,
-            fraud_complaint=False,
-            gaming_detected=gaming,
-        )
-        reason = "月影会话评分结算"
-        if gaming:
-            reason = "月影会话结算（刷分检测）"
-        await update_credit(uid, delta, reason)
-        await _apply_eclipse_if_needed(uid)
-
-        # 推进修行任务
-        task_action = "session_good_4plus" if their_rating >= 4 else ""
-        if task_action:
-            newly_done = await update_recovery_task_progress(uid, task_action)
-        else:
-            newly_done = []
-        for done_task in newly_done:
-            await update_credit(uid, done_task["reward"], f"修行任务完成：{done_task['description']}")
-
-        summary = format_session_credit_summary(breakdown, delta)
-        task_note = _notify_recovery_completions(newly_done)
+    # 分别结算：双方的积分、遮蔽与修行任务在同一事务内完成，提交后再发送通知
+    summaries = []
+    async with unit_of_work():
+        for uid, my_rating, their_rating in [(user1, r2, r1), (user2, r1, r2)]:
+            delta, breakdown = calculate_session_credit(
+                rating_received=their_rating,
+                duration_minutes=duration_minutes,
+                photos_both_shared=both_photos,
+                photo_one_shared=one_photo,
+                completed_naturally=completed_naturally,
+                ai_quality_score=ai_quality,
+                fraud_complaint=False,
+                gaming_detected=gaming,
+            )
+            reason = "月影会话评分结算"
+            if gaming:
+                reason = "月影会话结算（刷分检测）"
+            await update_credit(uid, delta, reason)
+            await _apply_eclipse_if_needed(uid)
+
+            # 推进修行任务
+            task_action = "session_good_4plus" if their_rating >= 4 else ""
+            if task_action:
+                newly_done = await update_recovery_task_progress(uid, task_action)
+            else:
+                newly_done = []
+            for done_task in newly_done:
+                await update_credit(uid, done_task["reward"], f"修行任务完成：{done_task['description']}")
+
+            summary = format_session_credit_summary(breakdown, delta)
+            summaries.append((uid, summary + _notify_recovery_completions(newly_done)))
+
+    for uid, text in summaries:
         try:
-            await bot.send_message(uid, summary + task_note)
+            await bot.send_message(uid, text)
         except Exception as e:
             logger.error("发送结算消息失败 uid=%s: %s", uid, e)
 
@@ -1291,14 +1351,91 @@ async def cb_reveal_no(callback: CallbackQuery):
 # 管理员：审核待审灯笼
 # ---------------------------------------------------------------------------
 
+@router.message(Command("admin_stats"))
+async def cmd_admin_stats(message: Message):
+    """查看缓存命中率与后台写入器状态。"""
+    if not is_admin(message.from_user.id):
+        return
+
+    stats = get_runtime_stats()
+    stats["rate_limiter"] = rate_limiter.stats()
+    stats["updates"] = unit_of_work_middleware.stats()
+    stats["storage"] = storage_stats()
+    stats["http_client"] = http_client.stats()
+    stats["intent_cache"] = intent_cache_stats()
+    lines = ["📊 <b>运行时统计</b>"]
+    for name, values in stats.items():
+        detail = "，".join(f"{k}={v}" for k, v in values.items())
+        lines.append(f"• <b>{name}</b>：{detail}")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("admin_metrics"))
+async def cmd_admin_metrics(message: Message, command: CommandObject):
+    """查看最近 N 小时（默认 24）各类事件条数，读取小时汇总表。"""
+    if not is_admin(message.from_user.id):
+        return
+
+    arg = (command.args or "").strip()
+    hours = min(int(arg), 24 * 30) if arg.isdigit() and int(arg) > 0 else 24
+    totals = await get_metric_totals(hours)
+    if not totals:
+        await message.answer(f"📈 最近 {hours} 小时暂无指标事件。")
+        return
+    lines = [f"📈 <b>最近 {hours} 小时事件统计</b>"]
+    lines.extend(f"• {event_type}：{count}" for event_type, count in totals.items())
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("admin_reports"))
+async def cmd_admin_reports(message: Message, command: CommandObject):
+    """
+    不带参数：按举报人数倒序列出被举报的已审核灯笼；
+    带灯笼 ID（或前缀）：查看该灯笼最近的举报明细。
+    """
+    if not is_admin(message.from_user.id):
+        return
+
+    lid_hint = (command.args or "").strip()
+    if not lid_hint:
+        lanterns = await get_reported_lanterns(limit=10)
+        if not lanterns:
+            await message.answer("✅ 暂无被举报的已审核灯笼。")
+            return
+        lines = ["🚩 <b>被举报最多的灯笼</b>"]
+        lines.extend(
+            f"• <code>{l['lantern_id'][:8]}</code> {l.get('city')} · {l.get('type')}"
+            f" — {l['report_count']} 人举报"
+            for l in lanterns
+        )
+        lines.append("\n发送 /admin_reports &lt;ID&gt; 查看举报明细。")
+        await message.answer("\n".join(lines))
+        return
+
+    lantern = await get_lantern_by_prefix(lid_hint)
+    if not lantern:
+        await message.answer(f"🔍 未找到 ID 以 <code>{escape(lid_hint)}</code> 开头的灯笼。")
+        return
+    reports = await get_lantern_reports(lantern["lantern_id"], limit=10)
+    lines = [
+        f"🚩 <b>举报明细</b> <code>{lantern['lantern_id'][:8]}</code>"
+        f"（共 {lantern.get('report_count', 0)} 人举报，显示最近 {len(reports)} 条）"
+    ]
+    for r in reports:
+        when = r["reported_at"].strftime("%m-%d %H:%M") if r["reported_at"] else "?"
+        lines.append(f"• {when} 用户 <code>{r['reporter_id']}</code>：{escape(r['reason'])}")
+    await message.answer("\n".join(lines))
+
+
 @router.message(Command("admin_pending"))
 async def cmd_admin_pending(message: Message):
+    """认领一批待审核灯笼（多位管理员各自拿到互不重叠的批次）。"""
     if not is_admin(message.from_user.id):
         return
 
-    pending = await get_pending_lanterns(limit=5)
+    pending = await claim_moderation_batch(message.from_user.id, batch_size=5)
     if not pending:
-        await message.answer("✅ 暂无待审核灯笼。")
+        await message.answer("✅ 暂无待审核灯笼（或其余灯笼正由其他管理员审核）。")
         return
 
     for lantern in pending:
@@ -1330,6 +1467,32 @@ async def cmd_admin_pending(message: Message):
         else:
             await message.answer(text, reply_markup=kb)
 
+    await message.answer(
+        f"📋 以上 {len(pending)} 盏灯笼已由你认领 {MODERATION_LEASE_MINUTES:.0f} 分钟，"
+        "期间其他管理员不会看到。",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text="✅ 全部通过", callback_data="admin:bulk:approve"),
+                InlineKeyboardButton(text="❌ 全部拒绝", callback_data="admin:bulk:reject"),
+            ],
+            [InlineKeyboardButton(text="🔓 释放认领", callback_data="admin:bulk:release")],
+        ]),
+    )
+
+
+async def _after_moderation(lanterns: list, approve: bool):
+    """审核结算后的后续处理：推进修行任务（通过）或检查遮蔽（拒绝）；与审核在同一工作单元内调用。"""
+    for lantern in lanterns:
+        uid = lantern.get("submitted_by")
+        if not uid:
+            continue
+        if approve:
+            newly_done = await update_recovery_task_progress(uid, "lantern_approved")
+            for t in newly_done:
+                await update_credit(uid, t["reward"], f"修行任务完成：{t['description']}")
+        else:
+            await _apply_eclipse_if_needed(uid)
+
 
 @router.callback_query(F.data.startswith("admin:approve:"))
 async def cb_admin_approve(callback: CallbackQuery):
@@ -1337,17 +1500,13 @@ async def cb_admin_approve(callback: CallbackQuery):
         await callback.answer("无权限", show_alert=True)
         return
     lantern_id = callback.data.split(":", 2)[2]
-    await approve_lantern(lantern_id)
-
-    # 奖励投稿者
-    lantern = await get_lantern_by_id(lantern_id)
-    if lantern and lantern.get("submitted_by"):
-        uid = lantern["submitted_by"]
-        await update_credit(uid, +15, "灯笼审核通过")
-        # 推进修行任务
-        newly_done = await update_recovery_task_progress(uid, "lantern_approved")
-        for t in newly_done:
-            await update_credit(uid, t["reward"], f"修行任务完成：{t['description']}")
+    # 状态更新、投稿者奖励与修行任务在同一事务内完成，提交后再回复
+    async with unit_of_work():
+        done = await moderate_lanterns(callback.from_user.id, [lantern_id], approve=True)
+        await _after_moderation(done, approve=True)
+    if not done:
+        await callback.answer("该灯笼已被处理，或正由其他管理员审核。", show_alert=True)
+        return
 
     await callback.answer("✅ 已通过", show_alert=True)
     caption = (callback.message.caption or "") + "\n\n<b>✅ 已审核通过</b>"
@@ -1363,14 +1522,13 @@ async def cb_admin_reject(callback: CallbackQuery):
         await callback.answer("无权限", show_alert=True)
         return
     lantern_id = callback.data.split(":", 2)[2]
-    await reject_lantern(lantern_id)
-
-    # 扣除投稿者信用
-    lantern = await get_lantern_by_id(lantern_id)
-    if lantern and lantern.get("submitted_by"):
-        uid = lantern["submitted_by"]
-        await update_credit(uid, -20, "灯笼审核不通过")
-        await _apply_eclipse_if_needed(uid)
+    # 状态更新、投稿者扣分与遮蔽检查在同一事务内完成，提交后再回复
+    async with unit_of_work():
+        done = await moderate_lanterns(callback.from_user.id, [lantern_id], approve=False)
+        await _after_moderation(done, approve=False)
+    if not done:
+        await callback.answer("该灯笼已被处理，或正由其他管理员审核。", show_alert=True)
+        return
 
     await callback.answer("❌ 已拒绝", show_alert=True)
     if callback.message.photo:
@@ -1381,6 +1539,32 @@ async def cb_admin_reject(callback: CallbackQuery):
         await callback.message.edit_text(callback.message.text + "\n\n<b>❌ 已拒绝</b>")
 
 
+@router.callback_query(F.data.startswith("admin:bulk:"))
+async def cb_admin_bulk(callback: CallbackQuery):
+    """批量处理本管理员当前认领的灯笼（一个事务）或释放认领。"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("无权限", show_alert=True)
+        return
+    action = callback.data.split(":", 2)[2]
+    admin_id = callback.from_user.id
+
+    if action == "release":
+        released = await release_moderation_claims(admin_id)
+        await callback.answer(f"🔓 已释放 {released} 盏灯笼", show_alert=True)
+        await callback.message.edit_reply_markup(reply_markup=None)
+        return
+
+    approve = action == "approve"
+    async with unit_of_work():
+        done = await moderate_claimed_batch(admin_id, approve=approve)
+        await _after_moderation(done, approve=approve)
+    verb = "通过" if approve else "拒绝"
+    await callback.answer(f"已{verb} {len(done)} 盏灯笼", show_alert=True)
+    await callback.message.edit_text(
+        callback.message.text + f"\n\n<b>{'✅' if approve else '❌'} 已批量{verb} {len(done)} 盏</b>"
+    )
+
+
 # ---------------------------------------------------------------------------
 # 群管守护：机器人被邀请加入新群组
 # ---------------------------------------------------------------------------
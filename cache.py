@@ -0,0 +1,70 @@
+"""
+月影车姬机器人 - 进程内缓存
+YueYingCheJiBot - In-Process Caches
+
+TTLCache：容量有界的 LRU 缓存，每个条目带过期时间，并统计命中率。
+供 models.py 等模块缓存热点读取结果；写路径负责失效对应条目。
+
+依赖：纯 Python 标准库；单事件循环内使用，无需加锁。
+"""
+
+import time
+from collections import OrderedDict
+
+# 区分「未缓存」与「缓存了 None」的哨兵
+MISSING = object()
+
+
+class TTLCache:
+    """LRU + TTL 缓存：超过 maxsize 时淘汰最久未使用的条目，过期条目读取时剔除。"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, default=MISSING):
+        """读取条目；不存在或已过期时返回 default（默认 MISSING）。"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._data[key]
+        self._misses += 1
+        return default
+
+    def set(self, key, value, ttl: float = None):
+        """写入条目，ttl 缺省使用实例默认值。"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key):
+        """删除条目（不存在则忽略）。"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """返回命中 / 未命中次数、命中率与当前规模。"""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            "size": len(self._data),
+            "evictions": self._evictions,
+        }
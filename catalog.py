@@ -0,0 +1,147 @@
+"""
+月影车姬机器人 - 已审核灯笼目录（进程内快照）
+YueYingCheJiBot - Approved Lantern Catalog
+
+已审核灯笼数量小、变更少（仅管理员审核 / 编辑时变化），而召回与 Mini App
+每次请求都要读取。本模块在内存中维护一份快照：
+  - 按 (城市, 类型) 与城市分桶，桶内按 (submitted_at, lantern_id) 排序
+  - 全部已审核灯笼按 (submitted_at, lantern_id) 排序
+  - 已审核灯笼 feed 的 keyset 分页（二分定位游标，任意页码耗时相同）
+  - 高可信列表（真实度 ≥ 70）按真实度倒序
+
+条目为 models.py 的灯笼摘要字典（不含照片、举报明细等大字段）。快照由
+models.py 负责加载与增量刷新（本进程写入后直接刷新，其他实例通过
+PostgreSQL LISTEN/NOTIFY 通知）。读取返回浅拷贝，调用方可自由添加字段。
+依赖：纯 Python 标准库。
+"""
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Optional
+
+HIGH_TRUST_THRESHOLD = 70
+
+
+def _page_key(doc: dict) -> tuple:
+    """排序 / 分页键，与数据库 ORDER BY submitted_at, lantern_id 一致。"""
+    return (doc.get("submitted_at") or datetime.min, doc["lantern_id"])
+
+
+def _newest(docs: list, limit: int) -> list:
+    """升序列表中最新的 limit 条（新 → 旧）。"""
+    return docs[::-1][:limit] if limit > 0 else []
+
+
+class LanternCatalog:
+    """
+    已审核灯笼的内存目录。增删只修改主表并标记索引失效，读取时按需重建。
+    各分桶按 _page_key 升序存放（便于二分），读取时倒序返回。
+    """
+
+    def __init__(self):
+        self._by_id: dict = {}
+        self._by_city_type: dict = {}
+        self._by_city: dict = {}       # city -> (docs, keys)
+        self._recent: list = []
+        self._recent_keys: list = []
+        self._trusted: list = []
+        self._dirty = False
+        self.ready = False
+        self._stats = {"reads": 0, "upserts": 0, "removals": 0, "rebuilds": 0}
+
+    def load(self, docs: list):
+        """以全量已审核灯笼替换当前快照。"""
+        self._by_id = {d["lantern_id"]: d for d in docs if d.get("status") == "approved"}
+        self._dirty = True
+        self.ready = True
+
+    def upsert(self, doc: dict):
+        """写入一盏灯笼的最新状态；非已审核状态视为移出目录。"""
+        if doc.get("status") != "approved":
+            self.remove(doc["lantern_id"])
+            return
+        self._by_id[doc["lantern_id"]] = doc
+        self._dirty = True
+        self._stats["upserts"] += 1
+
+    def remove(self, lantern_id: str):
+        if self._by_id.pop(lantern_id, None) is not None:
+            self._dirty = True
+            self._stats["removals"] += 1
+
+    def get(self, lantern_id: str) -> Optional[dict]:
+        doc = self._by_id.get(lantern_id)
+        return dict(doc) if doc else None
+
+    def query(
+        self,
+        city: str = "",
+        resource_type: str = "",
+        limit: int = 50,
+        max_reports: int = None,
+    ) -> list:
+        """按城市 / 类型过滤已审核灯笼（按提交时间倒序），可排除举报人数 ≥ max_reports 的灯笼。"""
+        self._rebuild()
+        if city and resource_type:
+            docs = self._by_city_type.get((city, resource_type), [])
+        elif city:
+            docs = self._by_city.get(city, ([], []))[0]
+        elif resource_type:
+            docs = [d for d in self._recent if d.get("type") == resource_type]
+        else:
+            docs = self._recent
+        if max_reports is not None:
+            docs = [d for d in docs if d["report_count"] < max_reports]
+        return self._copies(_newest(docs, limit))
+
+    def page(self, city: str = "", after: tuple = None, limit: int = 50) -> list:
+        """
+        keyset 分页：返回排在 after=(submitted_at, lantern_id) 之后（更旧）的
+        最多 limit 条，新 → 旧。after 为 None 时从最新开始。
+        """
+        self._rebuild()
+        if city:
+            docs, keys = self._by_city.get(city, ([], []))
+        else:
+            docs, keys = self._recent, self._recent_keys
+        end = bisect_left(keys, after) if after else len(docs)
+        return self._copies(_newest(docs[max(0, end - limit):end], limit))
+
+    def high_trust(self, limit: int = 30) -> list:
+        """真实度 ≥ 70 的已审核灯笼（按真实度倒序）。"""
+        self._rebuild()
+        return self._copies(self._trusted[:limit])
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def stats(self) -> dict:
+        return {**self._stats, "size": len(self._by_id), "ready": self.ready}
+
+    def _copies(self, docs: list) -> list:
+        self._stats["reads"] += 1
+        return [dict(d) for d in docs]
+
+    def _rebuild(self):
+        if not self._dirty:
+            return
+        ordered = sorted(self._by_id.values(), key=_page_key)
+        by_city_type: dict = {}
+        by_city: dict = {}
+        for doc in ordered:
+            city, rtype = doc.get("city", ""), doc.get("type", "")
+            by_city_type.setdefault((city, rtype), []).append(doc)
+            docs, keys = by_city.setdefault(city, ([], []))
+            docs.append(doc)
+            keys.append(_page_key(doc))
+        self._recent = ordered
+        self._recent_keys = [_page_key(d) for d in ordered]
+        self._by_city_type = by_city_type
+        self._by_city = by_city
+        self._trusted = sorted(
+            (d for d in reversed(ordered) if (d.get("authenticity_score") or 0) >= HIGH_TRUST_THRESHOLD),
+            key=lambda d: d["authenticity_score"],
+            reverse=True,
+        )
+        self._dirty = False
+        self._stats["rebuilds"] += 1
@@ -190,6 +190,10 @@ RATE_LIMITS = {
 # 同一用户在短时间内触发限制的额外惩罚
 RATE_LIMIT_PENALTY = -10  # 兰花令
 
+# 灯笼审核结果对投稿者的奖惩
+LANTERN_APPROVED_REWARD = 15      # 审核通过
+LANTERN_REJECTED_PENALTY = -20    # 审核不通过
+
 
 def check_rate_limit(timestamps: list, action_type: str) -> tuple[bool, int]:
     """
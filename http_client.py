@@ -0,0 +1,121 @@
+"""
+月影车姬机器人 - 共享 HTTP 客户端
+YueYingCheJiBot - Shared HTTP Client
+
+进程内共用一个 aiohttp.ClientSession（AI 接口、Telegram 文件接口等出站请求），
+取代每次调用新建会话的做法：
+  1. 连接池复用 keep-alive 连接，省去每次调用的 TCP + TLS 握手
+  2. 总连接数与单主机连接数上限，避免突发流量打满对端
+  3. DNS 解析结果缓存 HTTP_DNS_CACHE_TTL 秒
+  4. 统计请求数、新建 / 复用连接数与 DNS 缓存命中，供运维观察
+
+由 main.py 在启动时 start()、退出时 stop()；未启动时首次使用会自动创建会话
+（脚本与本地调试）。Telegram Bot API 本身的请求仍由 aiogram 的会话负责。
+"""
+
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+import jsoncodec
+
+logger = logging.getLogger(__name__)
+
+# 连接池总上限 / 单主机上限
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "20"))
+# 空闲 keep-alive 连接保留秒数
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", "60"))
+# DNS 缓存秒数
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", "300"))
+# 默认超时（秒），单次请求可用 timeout= 覆盖
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "30"))
+
+
+class HttpClient:
+    """应用级共享 aiohttp 会话，附带连接复用统计。"""
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+        timeout: float = HTTP_TIMEOUT_SECONDS,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = {
+            "requests": 0,
+            "failed": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        self.session()
+
+    async def stop(self):
+        if self.running:
+            await self._session.close()
+        self._session = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """返回共享会话（须在事件循环中调用）；尚未创建或已关闭时新建。"""
+        if not self.running:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                json_serialize=jsoncodec.dumps,
+                trace_configs=[self._trace_config()],
+            )
+            logger.info(
+                "HTTP 连接池已创建（上限 %d，单主机 %d）", self.limit, self.limit_per_host
+            )
+        return self._session
+
+    def stats(self) -> dict:
+        opened = self._stats["connections_created"] + self._stats["connections_reused"]
+        reuse_rate = self._stats["connections_reused"] / opened if opened else 0.0
+        return {**self._stats, "reuse_rate": round(reuse_rate, 3), "running": self.running}
+
+    # ------------------------------------------------------------------
+    # 统计钩子
+    # ------------------------------------------------------------------
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        for signal, key in (
+            (trace.on_request_start, "requests"),
+            (trace.on_request_exception, "failed"),
+            (trace.on_connection_create_end, "connections_created"),
+            (trace.on_connection_reuseconn, "connections_reused"),
+            (trace.on_dns_cache_hit, "dns_cache_hits"),
+            (trace.on_dns_cache_miss, "dns_cache_misses"),
+        ):
+            signal.append(self._counter(key))
+        return trace
+
+    def _counter(self, key: str):
+        async def _count(_session, _ctx, _params):
+            self._stats[key] += 1
+        return _count
+
+
+http_client = HttpClient()
@@ -0,0 +1,56 @@
+"""
+月影车姬机器人 - JSON 编解码
+YueYingCheJiBot - JSON Codec
+
+统一的 JSON 编解码入口，供以下位置使用：
+  - SQLAlchemy 引擎的 json_serializer / json_deserializer（全部 JSONB 列）
+  - aiohttp Web API 响应（web.json_response(..., dumps=jsoncodec.dumps)）
+
+已安装 orjson 时使用 orjson，否则回退标准库 json，两者输出一致：
+  - datetime / date 原生编码为 ISO 8601 字符串（与 .isoformat() 相同）
+  - 非 ASCII 字符直接输出 UTF-8（等同 ensure_ascii=False），不加多余空格
+  - 非字符串字典键转为字符串
+依赖：orjson（可选）。
+"""
+
+import json
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:   # 可选依赖：未安装时使用标准库
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj):
+    """标准库回退：编码 datetime / date。"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj) -> bytes:
+        """编码为 UTF-8 字节串。"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    def dumps(obj) -> str:
+        """编码为 str。"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+
+    loads = orjson.loads
+
+else:
+    def dumps(obj) -> str:
+        """编码为 str。"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps_bytes(obj) -> bytes:
+        """编码为 UTF-8 字节串。"""
+        return dumps(obj).encode()
+
+    loads = json.loads
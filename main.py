@@ -25,6 +25,8 @@ YueYingCheJiBot - Application Entry Point
   TONGYI_API_KEY — 通义千问 API Key
   PORT          — 监听端口（Railway 自动注入 $PORT，默认 8080）
   ENV           — 运行环境，dev 时跳过 initData 验证
+  STORAGE_BACKEND — postgres（默认）/ memory（进程内存储，仅压测用）
+  HTTP_POOL_LIMIT / HTTP_POOL_LIMIT_PER_HOST — 出站 HTTP 连接池上限（默认 100 / 20）
 
 Railway 部署说明：
   - Railway 会自动注入 DATABASE_URL 和 PORT 环境变量
@@ -35,12 +37,23 @@ Railway 部署说明：
 import asyncio
 import logging
 import os
+import signal
 
 from aiohttp import web
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from bot import bot, dp
-from models import create_tables
+from http_client import http_client
+from models import (
+    create_tables,
+    expiry_sweeper,
+    lantern_view_counter,
+    load_group_settings,
+    load_lantern_catalog,
+    metrics_writer,
+    notify_listener,
+)
+from storage import STORAGE_BACKEND
 from web_api import create_web_app
 
 logging.basicConfig(
@@ -53,15 +66,55 @@ logger = logging.getLogger(__name__)
 WEBHOOK_PATH = "/webhook"
 
 
+async def start_background_workers():
+    """启动后台任务（批量写入器、计数聚合器、灯笼目录、群组设置缓存、LISTEN 监听与过期清理等）。"""
+    await metrics_writer.start()
+    await lantern_view_counter.start()
+    await load_lantern_catalog()
+    await load_group_settings()
+    await notify_listener.start()
+    await expiry_sweeper.start()
+
+
+async def stop_background_workers():
+    """停止后台任务，并刷写尚未落库的缓冲数据。"""
+    await expiry_sweeper.stop()
+    await notify_listener.stop()
+    await lantern_view_counter.stop()
+    await metrics_writer.stop()
+
+
 async def main():
     logger.info("🌙 月影车姬机器人启动中…")
 
-    # 1. 初始化 PostgreSQL 表结构（首次启动自动建表）
-    logger.info("🗄 初始化 PostgreSQL 数据库表…")
-    await create_tables()
-    logger.info("✅ 数据库表初始化完成")
-
-    # 2. 确定运行模式（Webhook 或 长轮询）
+    # 出站 HTTP 连接池（AI 接口、Telegram 文件接口），两种存储后端都需要
+    await http_client.start()
+    try:
+        if STORAGE_BACKEND == "memory":
+            # 内存存储（仅压测 / 本地调试）：不连接数据库，也不启动依赖数据库的后台任务
+            logger.warning("⚠️ STORAGE_BACKEND=memory：数据只保存在进程内，重启即丢失")
+            await _serve()
+            return
+
+        # 1. 初始化 PostgreSQL 表结构（首次启动自动建表）
+        logger.info("🗄 初始化 PostgreSQL 数据库表…")
+        await create_tables()
+        logger.info("✅ 数据库表初始化完成")
+
+        # 2. 启动后台批量写入
+        await start_background_workers()
+
+        try:
+            await _serve()
+        finally:
+            await stop_background_workers()
+    finally:
+        await http_client.stop()
+
+
+async def _serve():
+    """按配置启动 Webhook 或长轮询服务，直到收到退出信号。"""
+    # 确定运行模式（Webhook 或 长轮询）
     webhook_base = os.environ.get("WEBHOOK_URL", "").rstrip("/")
     port = int(os.environ.get("PORT", os.environ.get("WEB_PORT", 8080)))
 
@@ -88,8 +141,14 @@ async def main():
         site = web.TCPSite(runner, "0.0.0.0", port)
         await site.start()
         logger.info("🌙 Webhook 服务已就绪，等待 Telegram 推送…")
-        # 保持运行直到进程终止
-        await asyncio.Event().wait()
+        # 保持运行直到收到 SIGTERM / SIGINT（Railway 停止容器时发送 SIGTERM）
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop_event.set)
+        await stop_event.wait()
+        logger.info("🌒 收到退出信号，正在关闭…")
+        await runner.cleanup()
 
     else:
         # ── 长轮询模式（本地开发，无需公开 URL）──────────────────────────
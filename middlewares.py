@@ -0,0 +1,86 @@
+"""
+月影车姬机器人 - aiogram 中间件
+YueYingCheJiBot - Dispatcher Middlewares
+
+UnitOfWorkMiddleware（注册为 message / callback_query 的内层中间件）：
+  - 统计每次更新的耗时与连接池签出次数，供 /admin_stats 查看
+  - 按更新内是否开启过 storage.unit_of_work() 分为 uow / plain 两组，
+    即可直接对比同类处理器使用工作单元前后的签出数与耗时
+
+工作单元由处理器在内部显式开启：多步写库放在 async with unit_of_work() 中
+（共用一个会话与事务、只签出一次连接，退出时统一提交，异常则整体回滚；
+内存存储后端下为空上下文），退出后再回复 Telegram——回复不落在事务内，
+行锁不跨网络调用持有，提交失败时用户也不会先看到成功提示。
+块内不要等待 AI 等慢调用，避免长时间占用连接。
+
+ActingUserMiddleware：把发起更新的 Telegram 用户声明为当前操作用户，
+models 据此在该用户刚写入后的短时间内把只读查询留在主库（读己之写）。
+"""
+
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from models import acting_user, track_checkouts
+
+
+class ActingUserMiddleware(BaseMiddleware):
+    """设置当前操作用户（aiogram 已在 data["event_from_user"] 中解析出发起者）。"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict,
+    ) -> Any:
+        user = data.get("event_from_user")
+        with acting_user(user.id if user else None):
+            return await handler(event, data)
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """统计每次更新的耗时与连接签出数，按更新内是否开启过工作单元分组。"""
+
+    def __init__(self):
+        self._stats = {
+            mode: {"updates": 0, "total_ms": 0.0, "checkouts": 0, "max_checkouts": 0}
+            for mode in ("plain", "uow")
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict,
+    ) -> Any:
+        start = time.perf_counter()
+        async with track_checkouts() as box:
+            try:
+                return await handler(event, data)
+            finally:
+                mode = "uow" if box[1] else "plain"
+                self._record(mode, (time.perf_counter() - start) * 1000, box[0])
+
+    def _record(self, mode: str, elapsed_ms: float, checkouts: int):
+        s = self._stats[mode]
+        s["updates"] += 1
+        s["total_ms"] += elapsed_ms
+        s["checkouts"] += checkouts
+        s["max_checkouts"] = max(s["max_checkouts"], checkouts)
+
+    def stats(self) -> dict:
+        out = {}
+        for mode, s in self._stats.items():
+            n = s["updates"] or 1
+            out[f"{mode}_updates"] = s["updates"]
+            out[f"{mode}_avg_ms"] = round(s["total_ms"] / n, 1)
+            out[f"{mode}_avg_checkouts"] = round(s["checkouts"] / n, 2)
+            out[f"{mode}_max_checkouts"] = s["max_checkouts"]
+        return out
+
+
+# 进程级单例（bot.py 注册到 router.message / router.callback_query）
+acting_user_middleware = ActingUserMiddleware()
+unit_of_work_middleware = UnitOfWorkMiddleware()
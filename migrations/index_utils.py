@@ -0,0 +1,21 @@
+"""
+迁移共用的索引辅助函数
+Shared Index Helpers for Migrations
+
+以 CREATE INDEX CONCURRENTLY IF NOT EXISTS 建索引的迁移先调用 drop_if_invalid()，
+保证中断后重跑能重新构建索引。各迁移以 from migrations.index_utils import ... 引用
+（与 env.py 导入 models 一样，依赖项目根目录在 sys.path 中）。
+"""
+
+from alembic import op
+
+
+def drop_if_invalid(name: str):
+    """上次 CONCURRENTLY 构建中断会留下 INVALID 索引，IF NOT EXISTS 会误跳过，先删除。"""
+    op.execute(
+        "DO $$ BEGIN"
+        " IF EXISTS (SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+        f" WHERE c.relname = '{name}' AND NOT i.indisvalid) THEN"
+        f" EXECUTE 'DROP INDEX {name}';"
+        " END IF; END $$"
+    )
@@ -0,0 +1,169 @@
+"""baseline：原 create_all 建立的全部表
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+已有部署的表由旧版 create_tables（Base.metadata.create_all）建立，
+因此每张表都先检查是否存在，存在则跳过，新旧库均可直接 upgrade head。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name: str, *columns, indexes=()):
+    """建表并创建索引；表已存在时整体跳过。indexes 为 (索引名, 列列表, 是否唯一)。"""
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade():
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.BigInteger, nullable=False),
+        sa.Column("username", sa.String(255)),
+        sa.Column("full_name", sa.String(255)),
+        sa.Column("credit_score", sa.Integer),
+        sa.Column("collected_lanterns", JSONB),
+        sa.Column("subscriptions", JSONB),
+        sa.Column("guard_enabled", sa.Boolean),
+        sa.Column("action_timestamps", JSONB),
+        sa.Column("recovery_tasks", JSONB),
+        sa.Column("last_preferences", JSONB),
+        sa.Column("last_daily_recovery", sa.DateTime, nullable=True),
+        sa.Column("daily_clean_streak", sa.Integer),
+        sa.Column("credit_history", JSONB),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("last_active", sa.DateTime),
+        indexes=[("ix_users_user_id", ["user_id"], True)],
+    )
+    _create_table(
+        "credit_events",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.BigInteger, nullable=False),
+        sa.Column("delta", sa.Integer, nullable=False),
+        sa.Column("reason", sa.String(255)),
+        sa.Column("balance_after", sa.Integer, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+        indexes=[("ix_credit_events_user_created", ["user_id", "created_at"], False)],
+    )
+    _create_table(
+        "rate_limit_windows",
+        sa.Column("user_id", sa.BigInteger, primary_key=True),
+        sa.Column("action", sa.String(20), primary_key=True),
+        sa.Column("hits", ARRAY(sa.DateTime), nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        indexes=[("ix_rate_limit_windows_expires_at", ["expires_at"], False)],
+    )
+    _create_table(
+        "lanterns",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("lantern_id", sa.String(36), nullable=False),
+        sa.Column("city", sa.String(100)),
+        sa.Column("type", sa.String(100)),
+        sa.Column("price_range", sa.String(50)),
+        sa.Column("description", sa.Text),
+        sa.Column("authenticity_score", sa.Float, nullable=True),
+        sa.Column("authenticity_labels", JSONB),
+        sa.Column("location_blur", sa.String(255)),
+        sa.Column("photo_file_ids", JSONB),
+        sa.Column("submitted_by", sa.BigInteger, nullable=True),
+        sa.Column("submitted_at", sa.DateTime),
+        sa.Column("status", sa.String(20)),
+        sa.Column("reports", JSONB),
+        sa.Column("views", sa.Integer),
+        sa.Column("updated_at", sa.DateTime),
+        sa.Column("needs_human_review", sa.Boolean),
+        indexes=[
+            ("ix_lanterns_lantern_id", ["lantern_id"], True),
+            ("ix_lanterns_city", ["city"], False),
+            ("ix_lanterns_type", ["type"], False),
+            ("ix_lanterns_submitted_by", ["submitted_by"], False),
+            ("ix_lanterns_submitted_at", ["submitted_at"], False),
+            ("ix_lanterns_status", ["status"], False),
+        ],
+    )
+    _create_table(
+        "anonymous_chats",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user1", sa.BigInteger, nullable=False),
+        sa.Column("user2", sa.BigInteger, nullable=False),
+        sa.Column("messages", JSONB),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("expires_at", sa.DateTime, nullable=True),
+        sa.Column("revealed", sa.Boolean),
+        sa.Column("completed_naturally", sa.Boolean),
+        sa.Column("ended_at", sa.DateTime, nullable=True),
+        sa.Column("ratings", JSONB),
+        sa.Column("photos_shared", JSONB),
+        indexes=[("ix_anonymous_chats_chat_id", ["chat_id"], True)],
+    )
+    _create_table(
+        "chat_messages",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("sender_id", sa.BigInteger, nullable=False),
+        sa.Column("text", sa.Text),
+        sa.Column("sent_at", sa.DateTime),
+        indexes=[("ix_chat_messages_chat_sent", ["chat_id", "sent_at"], False)],
+    )
+    _create_table(
+        "chat_requests",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("request_id", sa.String(36), nullable=False),
+        sa.Column("requester_id", sa.BigInteger, nullable=False),
+        sa.Column("lantern_id", sa.String(36), nullable=False),
+        sa.Column("lantern_owner_id", sa.BigInteger, nullable=False),
+        sa.Column("status", sa.String(20)),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("expires_at", sa.DateTime, nullable=True),
+        sa.Column("accepted_at", sa.DateTime, nullable=True),
+        sa.Column("declined_at", sa.DateTime, nullable=True),
+        indexes=[("ix_chat_requests_request_id", ["request_id"], True)],
+    )
+    _create_table(
+        "metrics",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("event_type", sa.String(100), nullable=False),
+        sa.Column("data", JSONB),
+        sa.Column("user_id", sa.BigInteger, nullable=True),
+        sa.Column("action", sa.String(100)),
+        sa.Column("lantern_id", sa.String(36)),
+        sa.Column("metadata", JSONB),
+        sa.Column("created_at", sa.DateTime),
+        indexes=[
+            ("ix_metrics_event_type", ["event_type"], False),
+            ("ix_metrics_created_at", ["created_at"], False),
+        ],
+    )
+    _create_table(
+        "group_settings",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("group_id", sa.BigInteger, nullable=False),
+        sa.Column("group_name", sa.String(255)),
+        sa.Column("anti_fraud_enabled", sa.Boolean),
+        sa.Column("welcome_enabled", sa.Boolean),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+        indexes=[("ix_group_settings_group_id", ["group_id"], True)],
+    )
+
+
+def downgrade():
+    for name in (
+        "group_settings", "metrics", "chat_requests", "chat_messages",
+        "anonymous_chats", "lanterns", "rate_limit_windows", "credit_events", "users",
+    ):
+        op.drop_table(name)
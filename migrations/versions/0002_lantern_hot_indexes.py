@@ -0,0 +1,74 @@
+"""灯笼热点查询的复合 / 部分索引
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+按访问路径建索引（均在 autocommit 块中 CREATE INDEX CONCURRENTLY，不阻塞写入）：
+  - 已审核 + 城市 + 类型，按 submitted_at 倒序   → 多路召回
+  - 已审核 + 城市，按 submitted_at 倒序          → 城市列表 / 周边城市回退
+  - 已审核，按 submitted_at 倒序                 → Mini App 全量列表
+  - 已审核且真实度 ≥ 70，按真实度倒序            → 冷启动高可信兜底
+  - 待审核，按 submitted_at 正序                 → 管理员审核队列
+  - lower(lantern_id) text_pattern_ops           → 短 ID 前缀查找（LIKE 'x%'）
+city / type / status 单列索引被以上索引覆盖，一并删除以减少写放大。
+"""
+
+from alembic import op
+
+from migrations.index_utils import drop_if_invalid
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "ix_lanterns_approved_city_type_submitted",
+        "(city, type, submitted_at DESC) WHERE status = 'approved'",
+    ),
+    (
+        "ix_lanterns_approved_city_submitted",
+        "(city, submitted_at DESC) WHERE status = 'approved'",
+    ),
+    (
+        "ix_lanterns_approved_submitted",
+        "(submitted_at DESC) WHERE status = 'approved'",
+    ),
+    (
+        "ix_lanterns_approved_high_trust",
+        "(authenticity_score DESC) WHERE status = 'approved' AND authenticity_score >= 70",
+    ),
+    (
+        "ix_lanterns_pending_submitted",
+        "(submitted_at) WHERE status = 'pending'",
+    ),
+    (
+        "ix_lanterns_lantern_id_lower",
+        "(lower(lantern_id) text_pattern_ops)",
+    ),
+]
+
+REPLACED_INDEXES = [
+    ("ix_lanterns_city", "(city)"),
+    ("ix_lanterns_type", "(type)"),
+    ("ix_lanterns_status", "(status)"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            drop_if_invalid(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON lanterns {definition}")
+        for name, _ in REPLACED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in REPLACED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON lanterns {definition}")
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
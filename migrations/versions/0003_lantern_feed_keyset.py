@@ -0,0 +1,52 @@
+"""灯笼 feed keyset 分页索引
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+feed 按 (submitted_at DESC, lantern_id DESC) 排序并以行值比较翻页，
+索引需包含 lantern_id 作为并列时的决胜列，才能直接按索引顺序定位任意页。
+新索引替代 0002 的 ix_lanterns_approved_submitted / ix_lanterns_approved_city_submitted。
+"""
+
+from alembic import op
+
+from migrations.index_utils import drop_if_invalid
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "ix_lanterns_approved_feed",
+        "(submitted_at DESC, lantern_id DESC) WHERE status = 'approved'",
+    ),
+    (
+        "ix_lanterns_approved_city_feed",
+        "(city, submitted_at DESC, lantern_id DESC) WHERE status = 'approved'",
+    ),
+]
+
+REPLACED_INDEXES = [
+    ("ix_lanterns_approved_submitted", "(submitted_at DESC) WHERE status = 'approved'"),
+    ("ix_lanterns_approved_city_submitted", "(city, submitted_at DESC) WHERE status = 'approved'"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            drop_if_invalid(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON lanterns {definition}")
+        for name, _ in REPLACED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in REPLACED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON lanterns {definition}")
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,44 @@
+"""审核队列认领（SKIP LOCKED 租约）
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+lanterns 新增 review_claimed_by / review_claim_expires_at 记录管理员的审核租约；
+待审核索引改为 (needs_human_review DESC NULLS LAST, submitted_at)，
+与认领查询的优先级排序一致（需人工复核的灯笼优先）。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.index_utils import drop_if_invalid
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 可空列、无默认值：只改目录，不重写表
+    op.add_column("lanterns", sa.Column("review_claimed_by", sa.BigInteger, nullable=True))
+    op.add_column("lanterns", sa.Column("review_claim_expires_at", sa.DateTime, nullable=True))
+    with op.get_context().autocommit_block():
+        drop_if_invalid("ix_lanterns_pending_queue")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_lanterns_pending_queue ON lanterns"
+            " (needs_human_review DESC NULLS LAST, submitted_at) WHERE status = 'pending'"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_lanterns_pending_submitted")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_lanterns_pending_submitted ON lanterns"
+            " (submitted_at) WHERE status = 'pending'"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_lanterns_pending_queue")
+    op.drop_column("lanterns", "review_claim_expires_at")
+    op.drop_column("lanterns", "review_claimed_by")
@@ -0,0 +1,73 @@
+"""过期会话 / 申请归档表与 expires_at 索引
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+过期清理器按 expires_at 范围扫描取最早过期的一批行，
+anonymous_chats / chat_requests 需要 expires_at 索引；归档表接收 DELETE ... RETURNING 的行。
+会话消息不归档（会话承诺 24 小时后销毁），只保留条数。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from migrations.index_utils import drop_if_invalid
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_anonymous_chats_expires_at", "anonymous_chats"),
+    ("ix_chat_requests_expires_at", "chat_requests"),
+]
+
+
+def upgrade():
+    op.create_table(
+        "anonymous_chats_archive",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user1", sa.BigInteger, nullable=False),
+        sa.Column("user2", sa.BigInteger, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("expires_at", sa.DateTime),
+        sa.Column("revealed", sa.Boolean),
+        sa.Column("completed_naturally", sa.Boolean),
+        sa.Column("ended_at", sa.DateTime),
+        sa.Column("ratings", JSONB),
+        sa.Column("photos_shared", JSONB),
+        sa.Column("message_count", sa.Integer),
+        sa.Column("archived_at", sa.DateTime),
+    )
+    op.create_index("ix_anonymous_chats_archive_chat_id", "anonymous_chats_archive", ["chat_id"])
+    op.create_table(
+        "chat_requests_archive",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("request_id", sa.String(36), nullable=False),
+        sa.Column("requester_id", sa.BigInteger, nullable=False),
+        sa.Column("lantern_id", sa.String(36), nullable=False),
+        sa.Column("lantern_owner_id", sa.BigInteger, nullable=False),
+        sa.Column("status", sa.String(20)),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("expires_at", sa.DateTime),
+        sa.Column("accepted_at", sa.DateTime),
+        sa.Column("declined_at", sa.DateTime),
+        sa.Column("archived_at", sa.DateTime),
+    )
+    op.create_index("ix_chat_requests_archive_request_id", "chat_requests_archive", ["request_id"])
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            drop_if_invalid(name)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} (expires_at)")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.drop_table("chat_requests_archive")
+    op.drop_table("anonymous_chats_archive")
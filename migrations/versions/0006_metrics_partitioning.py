@@ -0,0 +1,113 @@
+"""metrics 按天分区 + 小时级汇总表
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+普通表无法原地改为分区表，因此：
+  1. 旧表（及其索引、主键、序列归属）改名为 metrics_legacy，不复制数据；
+     保留期满后由 models.maintain_metric_partitions 整表删除
+  2. 新建 metrics 为 PARTITION BY RANGE (created_at) 的分区父表，沿用原 id 序列，
+     预建今天起数天的日分区及一个 DEFAULT 分区（兜底，正常应为空）
+  3. 新建 metric_rollups_hourly（小时 × 事件类型 × 动作 计数），并从旧表回填一次
+此后写入路径在同一事务内增量更新汇总表，看板查询只读汇总表。
+
+downgrade 会丢弃升级后写入新分区表的原始事件。
+"""
+
+from datetime import datetime, timedelta
+
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+PARTITION_DAYS_AHEAD = 3
+
+
+def _create_day_partition(day):
+    upper = day + timedelta(days=1)
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS metrics_p{day:%Y%m%d} PARTITION OF metrics"
+        f" FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+    )
+
+
+def upgrade():
+    op.execute("ALTER TABLE metrics RENAME TO metrics_legacy")
+    op.execute("ALTER INDEX metrics_pkey RENAME TO metrics_legacy_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_metrics_event_type RENAME TO ix_metrics_legacy_event_type")
+    op.execute("ALTER INDEX IF EXISTS ix_metrics_created_at RENAME TO ix_metrics_legacy_created_at")
+    # 序列改为 bigint 并与旧表解绑，删除旧表时不会连带删除
+    op.execute("ALTER SEQUENCE metrics_id_seq AS BIGINT OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE metrics (
+            id BIGINT NOT NULL DEFAULT nextval('metrics_id_seq'),
+            event_type VARCHAR(100) NOT NULL,
+            data JSONB,
+            user_id BIGINT,
+            action VARCHAR(100),
+            lantern_id VARCHAR(36),
+            metadata JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE metrics_id_seq OWNED BY metrics.id")
+    op.execute("CREATE INDEX ix_metrics_event_type_created ON metrics (event_type, created_at)")
+    op.execute("CREATE TABLE metrics_default PARTITION OF metrics DEFAULT")
+    today = datetime.utcnow().date()
+    for i in range(PARTITION_DAYS_AHEAD + 1):
+        _create_day_partition(today + timedelta(days=i))
+
+    op.execute(
+        """
+        CREATE TABLE metric_rollups_hourly (
+            bucket TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            event_type VARCHAR(100) NOT NULL,
+            action VARCHAR(100) NOT NULL DEFAULT '',
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, event_type, action)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_metric_rollups_hourly_event_bucket"
+        " ON metric_rollups_hourly (event_type, bucket)"
+    )
+    op.execute(
+        """
+        INSERT INTO metric_rollups_hourly (bucket, event_type, action, count)
+        SELECT date_trunc('hour', created_at), event_type, COALESCE(action, ''), count(*)
+        FROM metrics_legacy
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE metric_rollups_hourly")
+    op.execute("ALTER SEQUENCE metrics_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE metrics")
+    op.execute(
+        "DO $$ BEGIN"
+        " IF to_regclass('metrics_legacy') IS NULL THEN"
+        " CREATE TABLE metrics_legacy ("
+        " id INTEGER PRIMARY KEY DEFAULT nextval('metrics_id_seq'),"
+        " event_type VARCHAR(100) NOT NULL, data JSONB, user_id BIGINT,"
+        " action VARCHAR(100), lantern_id VARCHAR(36), metadata JSONB, created_at TIMESTAMP);"
+        " CREATE INDEX ix_metrics_legacy_event_type ON metrics_legacy (event_type);"
+        " CREATE INDEX ix_metrics_legacy_created_at ON metrics_legacy (created_at);"
+        " END IF; END $$"
+    )
+    op.execute("ALTER TABLE metrics_legacy RENAME TO metrics")
+    op.execute("ALTER INDEX IF EXISTS metrics_legacy_pkey RENAME TO metrics_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_metrics_legacy_event_type RENAME TO ix_metrics_event_type")
+    op.execute("ALTER INDEX IF EXISTS ix_metrics_legacy_created_at RENAME TO ix_metrics_created_at")
+    op.execute("ALTER SEQUENCE metrics_id_seq OWNED BY metrics.id")
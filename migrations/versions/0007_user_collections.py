@@ -0,0 +1,66 @@
+"""时光秘匣收藏表 user_collections 与 lanterns.collect_count
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+收藏从 users.collected_lanterns JSONB 数组迁到 user_collections：每个 (用户, 灯笼)
+一行，唯一约束保证收藏幂等，(user_id, id) 索引支撑按收藏先后的 keyset 翻页。
+lanterns.collect_count 为被收藏次数的冗余计数，收藏时在同一语句内累加。
+旧数组按原顺序回填（id 递增即收藏顺序），collected_at 未知留空；
+users.collected_lanterns 列保留但不再写入，降级时据新表写回。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_collections",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.BigInteger, nullable=False),
+        sa.Column("lantern_id", sa.String(36), nullable=False),
+        sa.Column("collected_at", sa.DateTime),
+        sa.UniqueConstraint("user_id", "lantern_id", name="uq_user_collections_user_lantern"),
+    )
+    op.create_index("ix_user_collections_user_id_id", "user_collections", ["user_id", "id"])
+    # 常量默认值（PostgreSQL 11+）只改目录，不重写 lanterns
+    op.add_column(
+        "lanterns",
+        sa.Column("collect_count", sa.Integer, nullable=False, server_default="0"),
+    )
+
+    op.execute(
+        "INSERT INTO user_collections (user_id, lantern_id)"
+        " SELECT u.user_id, e.lantern_id"
+        " FROM users u"
+        " CROSS JOIN LATERAL jsonb_array_elements_text("
+        "   CASE WHEN jsonb_typeof(u.collected_lanterns) = 'array'"
+        "   THEN u.collected_lanterns ELSE '[]'::jsonb END"
+        " ) WITH ORDINALITY AS e(lantern_id, ord)"
+        " ORDER BY u.user_id, e.ord"
+        " ON CONFLICT (user_id, lantern_id) DO NOTHING"
+    )
+    op.execute(
+        "UPDATE lanterns SET collect_count = c.n"
+        " FROM (SELECT lantern_id, count(*) AS n FROM user_collections GROUP BY lantern_id) c"
+        " WHERE lanterns.lantern_id = c.lantern_id"
+    )
+
+
+def downgrade():
+    op.execute(
+        "UPDATE users SET collected_lanterns = c.ids"
+        " FROM (SELECT user_id, jsonb_agg(lantern_id ORDER BY id) AS ids"
+        "       FROM user_collections GROUP BY user_id) c"
+        " WHERE users.user_id = c.user_id"
+    )
+    op.drop_column("lanterns", "collect_count")
+    op.drop_index("ix_user_collections_user_id_id", table_name="user_collections")
+    op.drop_table("user_collections")
@@ -0,0 +1,73 @@
+"""灯笼举报表 lantern_reports 与 lanterns.report_count
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+举报从 lanterns.reports JSONB 数组迁到 lantern_reports：每个 (灯笼, 举报人) 一行，
+唯一约束使同一用户重复举报不重复计数，(lantern_id, reporter_id) 唯一索引同时支撑
+按灯笼读取举报明细。lanterns.report_count 为举报人数的冗余计数，举报时在同一语句内
+累加，召回可直接在 SQL 中按举报数过滤 / 排序，摘要与完整文档不再携带举报数组。
+旧数组按原顺序回填：reporter_id 缺失或不是整数的记录跳过，无法解析的举报时间留空，
+个别脏数据不会使启动时的迁移失败。lanterns.reports 列保留但不再写入，降级时据新表写回。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "lantern_reports",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("lantern_id", sa.String(36), nullable=False),
+        sa.Column("reporter_id", sa.BigInteger, nullable=False),
+        sa.Column("reason", sa.String(255)),
+        sa.Column("evidence", sa.Text),
+        sa.Column("reported_at", sa.DateTime),
+        sa.UniqueConstraint("lantern_id", "reporter_id", name="uq_lantern_reports_lantern_reporter"),
+    )
+    # 常量默认值（PostgreSQL 11+）只改目录，不重写 lanterns
+    op.add_column(
+        "lanterns",
+        sa.Column("report_count", sa.Integer, nullable=False, server_default="0"),
+    )
+
+    op.execute(
+        "INSERT INTO lantern_reports (lantern_id, reporter_id, reason, evidence, reported_at)"
+        " SELECT l.lantern_id, (e.r->>'reporter_id')::bigint,"
+        "        left(coalesce(e.r->>'reason', ''), 255), coalesce(e.r->>'evidence', ''),"
+        r"        CASE WHEN e.r->>'reported_at' ~ '^\d{4}-\d{2}-\d{2}'"
+        "             THEN (e.r->>'reported_at')::timestamp END"
+        " FROM lanterns l"
+        " CROSS JOIN LATERAL jsonb_array_elements("
+        "   CASE WHEN jsonb_typeof(l.reports) = 'array' THEN l.reports ELSE '[]'::jsonb END"
+        " ) WITH ORDINALITY AS e(r, ord)"
+        " WHERE jsonb_typeof(e.r) = 'object'"
+        r"   AND e.r->>'reporter_id' ~ '^-?\d{1,18}$'"
+        " ORDER BY l.lantern_id, e.ord"
+        " ON CONFLICT (lantern_id, reporter_id) DO NOTHING"
+    )
+    op.execute(
+        "UPDATE lanterns SET report_count = c.n"
+        " FROM (SELECT lantern_id, count(*) AS n FROM lantern_reports GROUP BY lantern_id) c"
+        " WHERE lanterns.lantern_id = c.lantern_id"
+    )
+
+
+def downgrade():
+    op.execute(
+        "UPDATE lanterns SET reports = c.reports"
+        " FROM (SELECT lantern_id, jsonb_agg(jsonb_build_object("
+        "           'reporter_id', reporter_id, 'reason', reason, 'evidence', evidence,"
+        "           'reported_at', reported_at) ORDER BY id) AS reports"
+        "       FROM lantern_reports GROUP BY lantern_id) c"
+        " WHERE lanterns.lantern_id = c.lantern_id"
+    )
+    op.drop_column("lanterns", "report_count")
+    op.drop_table("lantern_reports")
@@ -0,0 +1,33 @@
+"""NLU 意图缓存表 intent_cache
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+ai.parse_query_intent 的 LLM 解析结果按 sha256(模型 + 规范化查询) 缓存，
+作为各进程内 LRU 缓存的共享第二级；expires_at 索引供 expiry_sweeper 分批清理过期行。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "intent_cache",
+        sa.Column("query_hash", sa.String(64), primary_key=True),
+        sa.Column("intent", JSONB, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_intent_cache_expires_at", "intent_cache", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_intent_cache_expires_at", table_name="intent_cache")
+    op.drop_table("intent_cache")
@@ -0,0 +1,69 @@
+"""从 users.credit_history 回填 credit_events
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+信用流水表上线前，users.credit_history JSONB 数组是信用变动的唯一记录；
+而单语句结算会把该数组截断为最近 CREDIT_HISTORY_LIMIT 条，截掉的部分无处可寻。
+本迁移把数组中的历史记录按原顺序写入 credit_events（迁移在 create_tables 中、
+服务启动前执行，先于任何结算）：
+  - 用户尚无流水：数组全部回填，最后一条的 balance_after 为当前信用分，向前逐条倒推
+  - 用户已有流水（已在新代码下结算过）：只回填早于最早一条流水的记录，
+    以最早流水的变动前余额为锚点倒推；重复执行不会重复写入
+缺少 delta 的记录跳过；无法解析的时间戳留空。
+"""
+
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        r"""
+        WITH legacy AS (
+            SELECT u.user_id, e.ord,
+                   (e.h->>'delta')::numeric::integer AS delta,
+                   left(coalesce(e.h->>'reason', ''), 255) AS reason,
+                   CASE WHEN e.h->>'timestamp' ~ '^\d{4}-\d{2}-\d{2}'
+                        THEN (e.h->>'timestamp')::timestamp END AS created_at
+            FROM users u
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE WHEN jsonb_typeof(u.credit_history) = 'array'
+                THEN u.credit_history ELSE '[]'::jsonb END
+            ) WITH ORDINALITY AS e(h, ord)
+            WHERE jsonb_typeof(e.h) = 'object'
+              AND jsonb_typeof(e.h->'delta') = 'number'
+        ), first_event AS (
+            SELECT DISTINCT ON (user_id) user_id, created_at,
+                   balance_after - delta AS balance_before
+            FROM credit_events
+            ORDER BY user_id, created_at, id
+        ), kept AS (
+            SELECT l.user_id, l.ord, l.delta, l.reason, l.created_at,
+                   COALESCE(f.balance_before, u.credit_score, 100) AS anchor
+            FROM legacy l
+            JOIN users u ON u.user_id = l.user_id
+            LEFT JOIN first_event f ON f.user_id = l.user_id
+            WHERE f.user_id IS NULL OR l.created_at < f.created_at
+        )
+        INSERT INTO credit_events (user_id, delta, reason, balance_after, created_at)
+        SELECT user_id, delta, reason,
+               anchor - COALESCE(sum(delta) OVER (
+                   PARTITION BY user_id ORDER BY ord DESC
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0),
+               created_at
+        FROM kept
+        ORDER BY user_id, ord
+        """
+    )
+
+
+def downgrade():
+    # 回填的行与之后的结算流水无法区分，降级不删除
+    pass
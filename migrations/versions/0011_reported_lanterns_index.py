@@ -0,0 +1,33 @@
+"""被举报灯笼的部分索引
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+
+管理员 /admin_reports 按举报人数倒序列出被举报的已审核灯笼；
+部分索引只覆盖 report_count > 0 的已审核行，体积很小，排序 + LIMIT 直接走索引。
+"""
+
+from alembic import op
+
+from migrations.index_utils import drop_if_invalid
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        drop_if_invalid("ix_lanterns_approved_reported")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_lanterns_approved_reported ON lanterns"
+            " (report_count DESC, submitted_at DESC)"
+            " WHERE status = 'approved' AND report_count > 0"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_lanterns_approved_reported")
@@ -0,0 +1,112 @@
+"""
+月影车姬机器人 - PostgreSQL LISTEN/NOTIFY 监听
+YueYingCheJiBot - Postgres Notification Listener
+
+多实例部署时，各进程内的快照 / 缓存需要在其他实例写库后失效。
+NotifyListener 占用一条独立的 asyncpg 连接（不占用 SQLAlchemy 连接池），
+按频道把通知分发给注册的异步处理函数；连接断开后自动重连，并调用
+on_reconnect 回调做全量同步，弥补断线期间错过的通知。
+
+发送端只需在写事务中执行 SELECT pg_notify(channel, payload)，
+通知在事务提交时才会投递。
+依赖：asyncpg（已随 SQLAlchemy 异步驱动安装）。
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class NotifyListener:
+    """单连接多频道的 LISTEN 客户端。"""
+
+    def __init__(self, dsn: str, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._handlers: dict = {}
+        self._resync: list = []
+        self._task = None
+        self._conn = None
+        self._pending: set = set()
+        self._stats = {"received": 0, "failed": 0, "reconnects": 0}
+
+    def register(
+        self,
+        channel: str,
+        handler: Callable[[str], Awaitable[None]],
+        on_reconnect: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        """注册频道处理函数（须在 start() 之前调用）。"""
+        self._handlers[channel] = handler
+        if on_reconnect is not None:
+            self._resync.append(on_reconnect)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self._handlers and not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    def stats(self) -> dict:
+        connected = self._conn is not None and not self._conn.is_closed()
+        return {**self._stats, "connected": connected, "channels": len(self._handlers)}
+
+    async def _run(self):
+        first = True
+        while True:
+            try:
+                self._conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.get_running_loop().create_future()
+                self._conn.add_termination_listener(
+                    lambda _conn: closed.done() or closed.set_result(None)
+                )
+                for channel in self._handlers:
+                    await self._conn.add_listener(channel, self._dispatch)
+                logger.info("LISTEN 已连接：%s", ", ".join(self._handlers))
+                if not first:
+                    self._stats["reconnects"] += 1
+                    for resync in self._resync:
+                        await resync()
+                first = False
+                await closed
+                logger.warning("LISTEN 连接已断开，%.0fs 后重连", self.reconnect_delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("LISTEN 连接失败: %s", e)
+                first = False   # 首次连接失败也可能错过通知，重连后需全量同步
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _dispatch(self, _conn, _pid, channel: str, payload: str):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        self._stats["received"] += 1
+        task = asyncio.create_task(self._handle(handler, channel, payload))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _handle(self, handler, channel: str, payload: str):
+        try:
+            await handler(payload)
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error("处理 %s 通知失败: %s", channel, e)
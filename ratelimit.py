@@ -0,0 +1,113 @@
+"""
+月影车姬机器人 - 滑动窗口速率限制
+YueYingCheJiBot - Sliding-Window Rate Limiter
+
+取代旧的 users.action_timestamps JSONB 方案：
+  1. 进程内缓存每个 (user_id, action) 的窗口命中时间，已确认超限时直接拒绝，无需访问数据库
+  2. 未命中缓存或尚有余量时，由 models.rate_limit_hit 以单条 upsert 原子地检查并记录
+  3. rate_limit_windows 表每行只保留窗口内的时间戳，整体过期的行定期批量清理
+  4. 统计放行 / 拒绝次数，供运维观察
+
+限额配置沿用 credit.RATE_LIMITS。
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from credit import RATE_LIMITS, check_rate_limit
+from storage import purge_expired_rate_limits, rate_limit_hit
+
+logger = logging.getLogger(__name__)
+
+# 进程内最多缓存的 (user_id, action) 窗口数，超出时淘汰最早写入的
+MAX_CACHED_WINDOWS = 50_000
+# 过期窗口清理间隔（秒）
+PURGE_INTERVAL_SECONDS = 600
+
+
+class SlidingWindowLimiter:
+    """
+    滑动窗口速率限制器。
+    缓存中的时间戳均已在数据库落库，是真实命中的子集，因此只用于「提前拒绝」；
+    放行判定始终以数据库的原子结果为准（多实例部署时依然正确）。
+    """
+
+    def __init__(self):
+        self._windows: dict[tuple[int, str], list] = {}
+        self._allowed: dict[str, int] = {}
+        self._denied: dict[str, int] = {}
+        self._local_denied = 0
+        self._last_purge = time.monotonic()
+        self._purge_task = None
+
+    async def hit(self, user_id: int, action_type: str) -> tuple[bool, int]:
+        """
+        检查并记录一次动作。
+        返回 (is_allowed, remaining)；未配置限额的动作始终放行。
+        """
+        config = RATE_LIMITS.get(action_type)
+        if not config:
+            return True, 999
+
+        key = (user_id, action_type)
+        cached = self._windows.get(key)
+        if cached is not None:
+            allowed, _ = check_rate_limit(cached, action_type)
+            if not allowed:
+                self._local_denied += 1
+                self._count(self._denied, action_type)
+                return False, 0
+
+        allowed, hits = await rate_limit_hit(
+            user_id,
+            action_type,
+            config["max"],
+            timedelta(hours=config["window_hours"]),
+        )
+        self._remember(key, hits)
+        self._count(self._allowed if allowed else self._denied, action_type)
+        self._maybe_purge()
+        return allowed, max(0, config["max"] - len(hits))
+
+    def stats(self) -> dict:
+        """返回放行 / 拒绝计数（按动作类型）及缓存规模。"""
+        return {
+            "allowed": dict(self._allowed),
+            "denied": dict(self._denied),
+            "local_denied": self._local_denied,
+            "cached_windows": len(self._windows),
+        }
+
+    @staticmethod
+    def _count(counter: dict, action_type: str):
+        counter[action_type] = counter.get(action_type, 0) + 1
+
+    def _remember(self, key: tuple, hits: list):
+        self._windows.pop(key, None)
+        self._windows[key] = hits
+        while len(self._windows) > MAX_CACHED_WINDOWS:
+            self._windows.pop(next(iter(self._windows)))
+
+    def _maybe_purge(self):
+        """距上次清理超过间隔时，后台批量删除过期窗口。"""
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        if self._purge_task and not self._purge_task.done():
+            return
+        self._last_purge = now
+        self._purge_task = asyncio.create_task(self._purge())
+
+    async def _purge(self):
+        try:
+            removed = await purge_expired_rate_limits()
+            if removed:
+                logger.info("清理过期速率限制窗口 %d 行", removed)
+        except Exception as e:
+            logger.warning("清理速率限制窗口失败: %s", e)
+
+
+# 进程级单例
+rate_limiter = SlidingWindowLimiter()
@@ -0,0 +1,129 @@
+"""
+AI 调用基准：每次新建 ClientSession vs 共享连接池
+AI Call Benchmark (per-call session vs shared HTTP client)
+
+在本机启动一个 aiohttp 桩服务代替 AI 接口（OpenAI 兼容格式，可用 --delay-ms
+模拟推理耗时），分别用两种方式发起 --calls 次调用（--concurrency 路并发）：
+  - per-call — 原 ai._call_ai 的做法：每次调用新建 aiohttp.ClientSession
+  - shared   — 现 ai._call_ai：共用 http_client 连接池（keep-alive）
+输出吞吐、耗时中位数 / p95，以及桩服务端看到的 TCP 连接数与客户端统计的
+连接复用率。桩服务为明文 HTTP，线上 HTTPS 接口每次新建连接还要额外付出
+TLS 握手，实际差距大于本地结果。不需要 API Key，也不访问外网。
+
+用法：
+  python scripts/bench_http_client.py [--calls 500] [--concurrency 10] [--delay-ms 0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")   # 不连接数据库
+
+import aiohttp  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+import ai  # noqa: E402
+from http_client import http_client  # noqa: E402
+
+STUB_PATH = "/v1/chat/completions"
+STUB_REPLY = {"choices": [{"message": {"role": "assistant", "content": '{"score": 80, "labels": []}'}}]}
+
+
+def _stub_app(delay: float, peers: set) -> web.Application:
+    async def completions(request: web.Request) -> web.Response:
+        peers.add(request.transport.get_extra_info("peername"))
+        await request.json()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response(STUB_REPLY)
+
+    app = web.Application()
+    app.router.add_post(STUB_PATH, completions)
+    return app
+
+
+async def _legacy_call_ai(messages: list) -> str:
+    """原 _call_ai：每次调用新建会话（新建 TCP 连接，调用结束即关闭）。"""
+    payload = {"model": ai.AI_MODEL, "messages": messages, "temperature": 0.3, "max_tokens": 1024}
+    headers = {"Authorization": f"Bearer {ai.AI_API_KEY}", "Content-Type": "application/json"}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            ai.AI_ENDPOINT, json=payload, headers=headers,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return data["choices"][0]["message"]["content"].strip()
+
+
+async def _bench(fn, calls: int, concurrency: int, peers: set) -> dict:
+    peers.clear()
+    messages = [{"role": "user", "content": "台北 大学生 3000-5000"}]
+    latencies: list = []
+    queue = iter(range(calls))
+
+    async def worker():
+        for _ in queue:
+            start = time.perf_counter()
+            await fn(messages)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "per_sec": calls / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "connections": len(peers),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    peers: set = set()
+    runner = web.AppRunner(_stub_app(args.delay_ms / 1000, peers))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    ai.AI_API_KEY = "bench"
+    ai.AI_ENDPOINT = f"http://127.0.0.1:{port}{STUB_PATH}"
+    await http_client.start()
+    try:
+        results = [
+            ("per-call", await _bench(_legacy_call_ai, args.calls, args.concurrency, peers)),
+            ("shared", await _bench(ai._call_ai, args.calls, args.concurrency, peers)),
+        ]
+        pool = http_client.stats()
+    finally:
+        await http_client.stop()
+        await runner.cleanup()
+
+    print(f"calls={args.calls} concurrency={args.concurrency} delay_ms={args.delay_ms}")
+    print(f"{'mode':10s} {'calls/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'tcp conns':>10s}")
+    for label, r in results:
+        print(
+            f"{label:10s} {r['per_sec']:>9.0f} {r['p50_ms']:>8.2f} "
+            f"{r['p95_ms']:>8.2f} {r['connections']:>10d}"
+        )
+    print(f"shared pool: {pool}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
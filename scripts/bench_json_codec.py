@@ -0,0 +1,118 @@
+"""
+JSON 编解码微基准：标准库 json vs jsoncodec（orjson 可用时）
+JSON Codec Microbenchmark
+
+不需要数据库。构造典型载荷：
+  - user    — 用户 JSONB 状态（credit_history 20 条、收藏 200 个、速率时间戳、修行任务）
+  - lantern — 灯笼完整文档（照片、真实度标签、举报计数）
+  - feed    — Mini App 一页 100 条灯笼摘要（含 datetime）
+分别测量编码（dumps）与解码（loads）的单次耗时中位数。
+
+用法：
+  python scripts/bench_json_codec.py [--rounds 2000]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import jsoncodec  # noqa: E402
+
+
+def _user_payload() -> dict:
+    now = datetime(2026, 10, 17, 12, 0, 0)
+    return {
+        "credit_history": [
+            {"delta": -5, "reason": "触发速率限制", "timestamp": (now - timedelta(hours=i)).isoformat()}
+            for i in range(20)
+        ],
+        "collected_lanterns": [str(uuid.UUID(int=i)) for i in range(200)],
+        "action_timestamps": {
+            action: [(now - timedelta(minutes=i)).isoformat() for i in range(30)]
+            for action in ("submit", "report", "session", "rate", "match")
+        },
+        "recovery_tasks": [
+            {"id": f"task_{i}", "description": "完成一次优质月影会话", "progress": 0,
+             "target": 1, "reward": 5, "completed": False}
+            for i in range(3)
+        ],
+        "last_preferences": {"city": "台北", "type": "大学生", "price": "3000-5000"},
+    }
+
+
+def _lantern_payload() -> dict:
+    return {
+        "lantern_id": str(uuid.uuid4()),
+        "city": "台北",
+        "type": "大学生",
+        "price_range": "3000-5000",
+        "description": "月影之下，灯笼微光。" * 20,
+        "authenticity_score": 87.5,
+        "authenticity_labels": ["heavy_edit"],
+        "photo_file_ids": [f"AgACAgUAAxkBAAI{i:04d}" + "x" * 60 for i in range(5)],
+        "report_count": 3,
+        "submitted_by": 123456789,
+        "status": "approved",
+        "views": 1024,
+    }
+
+
+def _feed_payload() -> dict:
+    now = datetime(2026, 10, 17, 12, 0, 0)
+    items = [
+        {
+            "lantern_id": str(uuid.UUID(int=i)),
+            "city": "台北", "type": "大学生", "price_range": "3000-5000",
+            "description": "月影之下，灯笼微光。" * 4,
+            "authenticity_score": 80.0, "authenticity_labels": [],
+            "status": "approved", "views": i, "report_count": 0,
+            "submitted_at": now - timedelta(minutes=i), "updated_at": now,
+            "lat": 25.04, "lng": 121.53,
+        }
+        for i in range(100)
+    ]
+    return {"items": items, "next_cursor": "AAXv8Q" * 5 + "AA"}
+
+
+def _stdlib_dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=lambda o: o.isoformat())
+
+
+def _median_us(fn, arg, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"jsoncodec backend: {jsoncodec.BACKEND}  rounds={args.rounds}")
+    print(f"{'payload':8s} {'bytes':>7s} {'op':>6s} {'stdlib us':>10s} {'codec us':>10s} {'speedup':>8s}")
+    for name, payload in (("user", _user_payload()), ("lantern", _lantern_payload()), ("feed", _feed_payload())):
+        encoded = jsoncodec.dumps(payload)
+        size = len(encoded.encode())
+        for op, std_fn, codec_fn, arg in (
+            ("dumps", _stdlib_dumps, jsoncodec.dumps, payload),
+            ("loads", json.loads, jsoncodec.loads, encoded),
+        ):
+            std_us = _median_us(std_fn, arg, args.rounds)
+            codec_us = _median_us(codec_fn, arg, args.rounds)
+            print(f"{name:8s} {size:>7d} {op:>6s} {std_us:>10.1f} {codec_us:>10.1f} {std_us / codec_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
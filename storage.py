@@ -0,0 +1,886 @@
+"""
+月影车姬机器人 - 存储后端
+YueYingCheJiBot - Pluggable Storage Backend
+
+bot.py / web_api.py / ratelimit.py / ai.py 通过本模块访问数据，函数名、参数与
+返回结构与 models.py 完全一致。实际实现由 STORAGE_BACKEND 选择：
+  - postgres（默认）— PostgresBackend，直接委托 models.py 的同名函数
+  - memory          — MemoryBackend，进程内字典实现，语义与 Postgres 版一致，
+                      用于在没有数据库的环境下压测处理器吞吐，把数据库开销与
+                      处理器自身开销区分开（进程重启后数据即丢失，不可用于生产）
+
+模块级函数在调用时才解析当前后端，use_storage() 切换后立即生效。
+Postgres 专有的设施（迁移、后台写入器、LISTEN、过期清理、运行时统计）仍直接从
+models.py 导入。
+依赖：纯 Python 标准库（postgres 后端依赖 models.py）。
+"""
+
+import copy
+import itertools
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+import models
+from catalog import LanternCatalog
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "postgres").strip().lower()
+# 内存后端保留的原始指标条数（小时汇总不受限）
+MEMORY_METRICS_KEEP = int(os.environ.get("MEMORY_METRICS_KEEP", "100000"))
+
+# 存储接口：各后端必须实现的函数（与 models.py 同名）
+API = (
+    # 用户
+    "get_or_create_user", "get_credit_score", "get_collected_ids", "update_credit",
+    "get_credit_events", "collect_lantern", "get_collection_page",
+    "save_user_preferences", "get_user_preferences",
+    "assign_recovery_tasks_to_user", "update_recovery_task_progress", "try_daily_recovery",
+    # 速率限制
+    "rate_limit_hit", "purge_expired_rate_limits",
+    # 指标
+    "log_metric", "log_behavior", "get_metric_rollups", "get_metric_totals",
+    # 灯笼
+    "create_lantern", "get_lantern_by_id", "get_lanterns_by_ids", "update_lantern_fields",
+    "report_lantern", "get_lantern_reports", "get_reported_lanterns", "increment_lantern_views",
+    "claim_moderation_batch", "release_moderation_claims",
+    "moderate_lanterns", "moderate_claimed_batch", "get_pending_lanterns",
+    "get_lantern_feed", "get_lanterns_by_city", "get_approved_lanterns",
+    "get_lanterns_multi_filter", "get_lantern_by_prefix", "get_high_trust_lanterns",
+    # 匿名会话
+    "create_anonymous_chat", "get_chat_by_id", "append_message", "get_recent_chat_messages",
+    "mark_photo_shared", "end_chat_naturally", "rate_session",
+    # 会话申请
+    "create_chat_request", "get_chat_request", "accept_chat_request", "decline_chat_request",
+    # 群组设置
+    "get_or_create_group_settings", "get_group_settings", "update_group_settings",
+    # NLU 意图缓存
+    "get_cached_intent", "save_cached_intent",
+)
+
+
+class StorageBackend(ABC):
+    """
+    存储后端抽象基类。子类须实现 API 中列出的全部异步函数（语义见 models.py
+    中的同名函数），以及 unit_of_work()（异步上下文管理器）。
+    缺少 unit_of_work 的子类无法实例化；缺少 API 函数的后端在 _BACKENDS 中注册后
+    导入本模块时即报错，直接传给 use_storage() 的实例在切换时报错。
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def unit_of_work(self):
+        """返回工作单元异步上下文管理器：其中的写入在同一事务内提交。"""
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+# =============================================================================
+# Postgres 后端（默认）
+# =============================================================================
+
+class PostgresBackend(StorageBackend):
+    """委托 models.py：每个接口函数即 models 中的同名函数。"""
+
+    name = "postgres"
+
+    def __init__(self):
+        for name in API:
+            setattr(self, name, getattr(models, name))
+
+    def unit_of_work(self):
+        return models.unit_of_work()
+
+
+# =============================================================================
+# 内存后端（压测用）
+# =============================================================================
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+class MemoryBackend(StorageBackend):
+    """
+    进程内字典实现。全部状态由一把可重入锁保护（持锁期间不 await），
+    可在多个线程各自的事件循环中共用；返回值均为深拷贝，调用方修改不影响存储。
+    没有事务：unit_of_work() 只是空上下文，每个函数各自原子生效。
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._users: dict = {}
+        self._credit_events: dict = {}     # user_id -> [事件]（旧 → 新）
+        self._collections: dict = {}       # user_id -> {lantern_id: 收藏序号}（按收藏先后）
+        self._reports: dict = {}           # lantern_id -> {reporter_id: 举报记录}（按举报先后）
+        self._collection_seq = itertools.count(1)
+        self._rate_limits: dict = {}       # (user_id, action) -> {"hits", "expires_at"}
+        self._metrics = deque(maxlen=MEMORY_METRICS_KEEP)
+        self._rollups: dict = {}           # (bucket, event_type, action) -> count
+        self._lanterns: dict = {}
+        self._claims: dict = {}            # lantern_id -> (admin_id, expires_at)
+        self._catalog = LanternCatalog()
+        self._catalog.load([])
+        self._chats: dict = {}
+        self._chat_messages: dict = {}     # chat_id -> [消息]（旧 → 新）
+        self._requests: dict = {}
+        self._groups: dict = {}
+        self._intents: dict = {}           # query_hash -> (expires_at, intent)
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        yield
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "users": len(self._users),
+                "lanterns": len(self._lanterns),
+                "chats": len(self._chats),
+                "chat_requests": len(self._requests),
+                "metrics": len(self._metrics),
+                "groups": len(self._groups),
+                "intents": len(self._intents),
+            }
+
+    # ------------------------------------------------------------------
+    # 用户
+    # ------------------------------------------------------------------
+    def _apply_credit(self, user: dict, delta: int, reason: str, now: datetime) -> int:
+        """信用结算（调用方持锁）：与 models._CREDIT_LEDGER_SQL 一致，历史只留最近 N 条。"""
+        user["credit_score"] += delta
+        user["credit_history"].append({"delta": delta, "reason": reason, "timestamp": now})
+        del user["credit_history"][:-models.CREDIT_HISTORY_LIMIT]
+        self._credit_events.setdefault(user["user_id"], []).append({
+            "delta": delta,
+            "reason": reason,
+            "balance_after": user["credit_score"],
+            "timestamp": now,
+        })
+        return user["credit_score"]
+
+    async def get_or_create_user(self, user_id: int, username: str = "", full_name: str = "") -> dict:
+        now = _now()
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                user = self._users[user_id] = {
+                    "user_id": user_id,
+                    "username": username or "",
+                    "full_name": full_name or "",
+                    "credit_score": 100,
+                    "subscriptions": {},
+                    "guard_enabled": False,
+                    "action_timestamps": {
+                        "submit": [], "report": [], "session": [], "rate": [], "match": [],
+                    },
+                    "recovery_tasks": [],
+                    "last_preferences": {},
+                    "last_daily_recovery": None,
+                    "daily_clean_streak": 0,
+                    "credit_history": [],
+                    "created_at": now,
+                    "last_active": now,
+                }
+            else:
+                user["last_active"] = now
+            return copy.deepcopy(user)
+
+    async def get_credit_score(self, user_id: int, default: int = 100) -> int:
+        with self._lock:
+            user = self._users.get(user_id)
+            return user["credit_score"] if user else default
+
+    async def get_collected_ids(self, user_id: int) -> list:
+        with self._lock:
+            return list(self._collections.get(user_id, {}))
+
+    async def update_credit(self, user_id: int, delta: int, reason: str = "") -> Optional[int]:
+        with self._lock:
+            user = self._users.get(user_id)
+            return self._apply_credit(user, delta, reason, _now()) if user else None
+
+    async def get_credit_events(self, user_id: int, limit: int = 50) -> list:
+        with self._lock:
+            events = self._credit_events.get(user_id, [])
+            return copy.deepcopy(events[::-1][:limit])
+
+    async def collect_lantern(self, user_id: int, lantern_id: str) -> bool:
+        with self._lock:
+            if user_id not in self._users:
+                return False
+            collected = self._collections.setdefault(user_id, {})
+            if lantern_id in collected:
+                return False
+            collected[lantern_id] = next(self._collection_seq)
+            lantern = self._lanterns.get(lantern_id)
+            if lantern:
+                lantern["collect_count"] += 1
+            return True
+
+    async def get_collection_page(self, user_id: int, cursor: str = None, limit: int = 10) -> dict:
+        limit = max(1, min(limit, models.FEED_PAGE_MAX))
+        last_id = models.decode_cursor(cursor)[1] if cursor else None
+        with self._lock:
+            collected = dict(self._collections.get(user_id, {}))
+        if last_id and last_id not in collected:
+            raise ValueError("cursor no longer matches collection")
+
+        ordered = list(collected)
+        start = ordered.index(last_id) + 1 if last_id else 0
+        page_ids = ordered[start:start + limit]
+        docs, missing = await self.get_lanterns_by_ids(page_ids)
+        end = start + len(page_ids)
+        return {
+            "ids": page_ids,
+            "offset": start,
+            "items": [models._lantern_summary_from_doc(d) for d in docs],
+            "missing": missing,
+            "next_cursor": (
+                models.encode_cursor(collected[page_ids[-1]], page_ids[-1]) if end < len(ordered) else None
+            ),
+            "total": len(ordered),
+        }
+
+    async def save_user_preferences(self, user_id: int, prefs: dict):
+        with self._lock:
+            user = self._users.get(user_id)
+            if user:
+                user["last_preferences"] = copy.deepcopy(prefs)
+                user["last_active"] = _now()
+
+    async def get_user_preferences(self, user_id: int) -> dict:
+        with self._lock:
+            user = self._users.get(user_id)
+            return copy.deepcopy(user["last_preferences"]) if user else {}
+
+    async def assign_recovery_tasks_to_user(self, user_id: int, tasks: list):
+        with self._lock:
+            user = self._users.get(user_id)
+            if not user:
+                return
+            existing_types = {t["type"] for t in user["recovery_tasks"]}
+            user["recovery_tasks"].extend(
+                copy.deepcopy(t) for t in tasks if t["type"] not in existing_types
+            )
+
+    async def update_recovery_task_progress(self, user_id: int, action: str) -> list:
+        from credit import progress_task  # 避免循环导入
+
+        with self._lock:
+            user = self._users.get(user_id)
+            if not user:
+                return []
+            newly_completed = []
+            updated_tasks = []
+            for task in user["recovery_tasks"]:
+                updated, just_done = progress_task(task, action)
+                updated_tasks.append(updated)
+                if just_done:
+                    newly_completed.append(copy.deepcopy(updated))
+            user["recovery_tasks"] = updated_tasks
+            return newly_completed
+
+    async def try_daily_recovery(self, user_id: int) -> int:
+        from credit import DAILY_RECOVERY_CAP  # 避免循环导入
+
+        now = _now()
+        delta = 1
+        with self._lock:
+            user = self._users.get(user_id)
+            if (
+                not user
+                or user["credit_score"] > DAILY_RECOVERY_CAP
+                or (user["last_daily_recovery"] and user["last_daily_recovery"] > now - timedelta(days=1))
+            ):
+                return 0
+            self._apply_credit(user, delta, "每日无违规恢复", now)
+            user["last_daily_recovery"] = now
+        return delta
+
+    # ------------------------------------------------------------------
+    # 速率限制
+    # ------------------------------------------------------------------
+    async def rate_limit_hit(
+        self,
+        user_id: int,
+        action_type: str,
+        max_hits: int,
+        window: timedelta,
+    ) -> tuple[bool, list]:
+        now = _now()
+        key = (user_id, action_type)
+        with self._lock:
+            entry = self._rate_limits.get(key)
+            if entry is None:
+                self._rate_limits[key] = {"hits": [now], "expires_at": now + window}
+                return True, [now]
+            hits = [h for h in entry["hits"] if h > now - window]
+            allowed = len(hits) < max_hits
+            if allowed:
+                hits.append(now)
+                entry["expires_at"] = now + window
+            entry["hits"] = hits
+            return allowed, list(hits)
+
+    async def purge_expired_rate_limits(self, batch_size: int = 1000) -> int:
+        now = _now()
+        with self._lock:
+            expired = [k for k, v in self._rate_limits.items() if v["expires_at"] < now][:batch_size]
+            for key in expired:
+                del self._rate_limits[key]
+            return len(expired)
+
+    # ------------------------------------------------------------------
+    # 指标（同步写入，无后台批量写入器）
+    # ------------------------------------------------------------------
+    def _record_metric(self, row: dict):
+        with self._lock:
+            self._metrics.append(row)
+            for key, count in models._rollup_counts([row]).items():
+                self._rollups[key] = self._rollups.get(key, 0) + count
+
+    async def log_metric(self, event_type: str, data: dict = None):
+        self._record_metric(models._metric_row(event_type, data))
+
+    async def log_behavior(
+        self,
+        user_id: int,
+        action: str,
+        lantern_id: str = "",
+        metadata: dict = None,
+    ):
+        self._record_metric(models._metric_row(
+            "behavior",
+            user_id=user_id,
+            action=action,
+            lantern_id=lantern_id,
+            metadata=metadata,
+        ))
+
+    async def get_metric_rollups(
+        self,
+        since: datetime,
+        until: datetime = None,
+        event_type: str = None,
+    ) -> list:
+        with self._lock:
+            rows = [
+                {"bucket": bucket, "event_type": et, "action": action, "count": count}
+                for (bucket, et, action), count in self._rollups.items()
+                if bucket >= since
+                and (until is None or bucket < until)
+                and (not event_type or et == event_type)
+            ]
+        return sorted(rows, key=lambda r: (r["bucket"], r["event_type"]))
+
+    async def get_metric_totals(self, hours: int = 24) -> dict:
+        since = _now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+        totals: dict = {}
+        with self._lock:
+            for (bucket, event_type, _), count in self._rollups.items():
+                if bucket >= since:
+                    totals[event_type] = totals.get(event_type, 0) + count
+        return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+    # ------------------------------------------------------------------
+    # 灯笼
+    # ------------------------------------------------------------------
+    def _refresh_catalog(self, doc: dict):
+        """调用方持锁：已审核灯笼进入目录，其余状态移出。"""
+        self._catalog.upsert(models._lantern_summary_from_doc(doc))
+
+    async def create_lantern(
+        self,
+        city: str,
+        resource_type: str,
+        price_range: str,
+        description: str,
+        photo_file_ids: list,
+        submitted_by: int,
+        location_blur: str = "",
+    ) -> str:
+        lantern_id = str(uuid.uuid4())
+        now = _now()
+        with self._lock:
+            self._lanterns[lantern_id] = {
+                "lantern_id": lantern_id,
+                "city": city or "",
+                "type": resource_type or "",
+                "price_range": price_range or "",
+                "description": description or "",
+                "authenticity_score": None,
+                "authenticity_labels": [],
+                "location_blur": location_blur or "",
+                "photo_file_ids": list(photo_file_ids or []),
+                "submitted_by": submitted_by,
+                "submitted_at": now,
+                "status": "pending",
+                "report_count": 0,
+                "views": 0,
+                "collect_count": 0,
+                "updated_at": now,
+                "needs_human_review": False,
+            }
+        return lantern_id
+
+    async def get_lantern_by_id(self, lantern_id: str) -> Optional[dict]:
+        with self._lock:
+            doc = self._lanterns.get(lantern_id)
+            return copy.deepcopy(doc) if doc else None
+
+    async def get_lanterns_by_ids(self, lantern_ids: list) -> tuple:
+        with self._lock:
+            docs = [copy.deepcopy(self._lanterns[lid]) for lid in lantern_ids if lid in self._lanterns]
+            missing = [lid for lid in lantern_ids if lid not in self._lanterns]
+        return docs, missing
+
+    async def update_lantern_fields(self, lantern_id: str, fields: dict) -> Optional[dict]:
+        with self._lock:
+            doc = self._lanterns.get(lantern_id)
+            if not doc:
+                return None
+            for key, value in fields.items():
+                if key in doc:
+                    doc[key] = copy.deepcopy(value)
+            self._refresh_catalog(doc)
+            return copy.deepcopy(doc)
+
+    async def report_lantern(
+        self,
+        lantern_id: str,
+        reporter_id: int,
+        reason: str,
+        evidence: str = "",
+    ) -> Optional[bool]:
+        with self._lock:
+            doc = self._lanterns.get(lantern_id)
+            if not doc:
+                return None
+            reports = self._reports.setdefault(lantern_id, {})
+            if reporter_id in reports:
+                return False
+            reports[reporter_id] = {
+                "reporter_id": reporter_id,
+                "reason": reason,
+                "evidence": evidence,
+                "reported_at": _now(),
+            }
+            doc["report_count"] += 1
+            self._refresh_catalog(doc)
+            return True
+
+    async def get_lantern_reports(self, lantern_id: str, limit: int = 20) -> list:
+        with self._lock:
+            reports = list(self._reports.get(lantern_id, {}).values())
+        return copy.deepcopy(reports[::-1][:limit])
+
+    async def get_reported_lanterns(self, limit: int = 10) -> list:
+        with self._lock:
+            docs = [
+                d for d in self._lanterns.values()
+                if d["status"] == "approved" and d["report_count"] > 0
+            ]
+            docs.sort(key=lambda d: (d["report_count"], d["submitted_at"]), reverse=True)
+            return copy.deepcopy([models._lantern_summary_from_doc(d) for d in docs[:limit]])
+
+    async def increment_lantern_views(self, lantern_id: str):
+        with self._lock:
+            doc = self._lanterns.get(lantern_id)
+            if doc:
+                doc["views"] += 1
+
+    def _pending(self) -> list:
+        """待审核灯笼（调用方持锁），排序与 models._PENDING_ORDER 一致。"""
+        return sorted(
+            (d for d in self._lanterns.values() if d["status"] == "pending"),
+            key=lambda d: (not d["needs_human_review"], d["submitted_at"]),
+        )
+
+    def _claimable(self, doc: dict, admin_id: int, now: datetime) -> bool:
+        if doc["status"] != "pending":
+            return False
+        claim = self._claims.get(doc["lantern_id"])
+        return claim is None or claim[1] < now or claim[0] == admin_id
+
+    async def claim_moderation_batch(self, admin_id: int, batch_size: int = 5) -> list:
+        now = _now()
+        expires_at = now + timedelta(minutes=models.MODERATION_LEASE_MINUTES)
+        with self._lock:
+            picked = [d for d in self._pending() if self._claimable(d, admin_id, now)][:batch_size]
+            for doc in picked:
+                self._claims[doc["lantern_id"]] = (admin_id, expires_at)
+            return copy.deepcopy(picked)
+
+    async def release_moderation_claims(self, admin_id: int) -> int:
+        with self._lock:
+            held = [
+                lid for lid, (holder, _) in self._claims.items()
+                if holder == admin_id and self._lanterns[lid]["status"] == "pending"
+            ]
+            for lid in held:
+                del self._claims[lid]
+            return len(held)
+
+    async def moderate_lanterns(self, admin_id: int, lantern_ids: list, approve: bool) -> list:
+        from credit import LANTERN_APPROVED_REWARD, LANTERN_REJECTED_PENALTY  # 避免循环导入
+
+        if approve:
+            status, delta, reason = "approved", LANTERN_APPROVED_REWARD, "灯笼审核通过"
+        else:
+            status, delta, reason = "rejected", LANTERN_REJECTED_PENALTY, "灯笼审核不通过"
+        now = _now()
+        with self._lock:
+            docs = [
+                self._lanterns[lid] for lid in dict.fromkeys(lantern_ids)
+                if lid in self._lanterns and self._claimable(self._lanterns[lid], admin_id, now)
+            ]
+            for doc in docs:
+                doc["status"] = status
+                doc["updated_at"] = now
+                self._claims.pop(doc["lantern_id"], None)
+                submitter = self._users.get(doc["submitted_by"])
+                if submitter:
+                    self._apply_credit(submitter, delta, reason, now)
+                self._refresh_catalog(doc)
+            return copy.deepcopy(docs)
+
+    async def moderate_claimed_batch(self, admin_id: int, approve: bool) -> list:
+        now = _now()
+        with self._lock:
+            lantern_ids = [
+                lid for lid, (holder, expires_at) in self._claims.items()
+                if holder == admin_id and expires_at >= now and self._lanterns[lid]["status"] == "pending"
+            ]
+        return await self.moderate_lanterns(admin_id, lantern_ids, approve)
+
+    async def get_pending_lanterns(self, limit: int = 50) -> list:
+        with self._lock:
+            return copy.deepcopy(self._pending()[:limit])
+
+    async def get_lantern_feed(self, city: str = "", cursor: str = None, limit: int = 50) -> dict:
+        limit = max(1, min(limit, models.FEED_PAGE_MAX))
+        after = models._decode_feed_cursor(cursor) if cursor else None
+        with self._lock:
+            items = self._catalog.page(city=city, after=after, limit=limit + 1)
+        has_more = len(items) > limit
+        items = items[:limit]
+        return {
+            "items": items,
+            "next_cursor": models._feed_cursor(items[-1]) if has_more else None,
+        }
+
+    async def get_lanterns_by_city(self, city: str, limit: int = 20) -> list:
+        with self._lock:
+            return self._catalog.query(city=city, limit=limit)
+
+    async def get_approved_lanterns(self, limit: int = 100) -> list:
+        with self._lock:
+            return self._catalog.query(limit=limit)
+
+    async def get_lanterns_multi_filter(
+        self,
+        city: str = "",
+        resource_type: str = "",
+        limit: int = 50,
+        max_reports: int = None,
+    ) -> list:
+        with self._lock:
+            return self._catalog.query(
+                city=city, resource_type=resource_type, limit=limit, max_reports=max_reports
+            )
+
+    async def get_lantern_by_prefix(self, lantern_id_prefix: str) -> Optional[dict]:
+        prefix = lantern_id_prefix.lower()
+        with self._lock:
+            matches = sorted(lid for lid in self._lanterns if lid.lower().startswith(prefix))
+            return copy.deepcopy(self._lanterns[matches[0]]) if matches else None
+
+    async def get_high_trust_lanterns(self, limit: int = 30) -> list:
+        with self._lock:
+            return self._catalog.high_trust(limit=limit)
+
+    # ------------------------------------------------------------------
+    # 匿名会话
+    # ------------------------------------------------------------------
+    def _chat_dict(self, chat: dict) -> dict:
+        return {**copy.deepcopy(chat), "message_count": len(self._chat_messages[chat["chat_id"]])}
+
+    async def create_anonymous_chat(self, user1: int, user2: int, ttl_hours: int = 24) -> str:
+        chat_id = str(uuid.uuid4())
+        now = _now()
+        with self._lock:
+            self._chats[chat_id] = {
+                "chat_id": chat_id,
+                "user1": user1,
+                "user2": user2,
+                "created_at": now,
+                "expires_at": now + timedelta(hours=ttl_hours),
+                "revealed": False,
+                "completed_naturally": False,
+                "ended_at": None,
+                "ratings": {},
+                "photos_shared": {},
+            }
+            self._chat_messages[chat_id] = []
+        return chat_id
+
+    async def get_chat_by_id(self, chat_id: str) -> Optional[dict]:
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            return self._chat_dict(chat) if chat else None
+
+    async def append_message(self, chat_id: str, sender_id: int, text: str):
+        with self._lock:
+            self._chat_messages.setdefault(chat_id, []).append(
+                {"sender_id": sender_id, "text": text or "", "sent_at": _now()}
+            )
+
+    async def get_recent_chat_messages(self, chat_id: str, limit: int = 30) -> list:
+        with self._lock:
+            return copy.deepcopy(self._chat_messages.get(chat_id, [])[-limit:])
+
+    async def mark_photo_shared(self, chat_id: str, sender_id: int):
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat:
+                chat["photos_shared"][str(sender_id)] = True
+
+    async def end_chat_naturally(self, chat_id: str):
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat:
+                chat["completed_naturally"] = True
+                chat["ended_at"] = _now()
+
+    async def rate_session(self, chat_id: str, rater_id: int, stars: int) -> Optional[dict]:
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if not chat:
+                return None
+            chat["ratings"][str(rater_id)] = {"stars": stars, "rated_at": _now().isoformat()}
+            return self._chat_dict(chat)
+
+    # ------------------------------------------------------------------
+    # 会话申请
+    # ------------------------------------------------------------------
+    async def create_chat_request(self, requester_id: int, lantern_id: str, lantern_owner_id: int) -> str:
+        request_id = str(uuid.uuid4())
+        now = _now()
+        with self._lock:
+            self._requests[request_id] = {
+                "request_id": request_id,
+                "requester_id": requester_id,
+                "lantern_id": lantern_id,
+                "lantern_owner_id": lantern_owner_id,
+                "status": "pending",
+                "created_at": now,
+                "expires_at": now + timedelta(hours=24),
+                "accepted_at": None,
+                "declined_at": None,
+            }
+        return request_id
+
+    async def get_chat_request(self, request_id: str) -> Optional[dict]:
+        with self._lock:
+            req = self._requests.get(request_id)
+            return dict(req) if req else None
+
+    async def accept_chat_request(self, request_id: str) -> Optional[dict]:
+        now = _now()
+        with self._lock:
+            req = self._requests.get(request_id)
+            if (
+                not req
+                or req["status"] != "pending"
+                or (req["expires_at"] is not None and req["expires_at"] <= now)
+            ):
+                return None
+            req["status"] = "accepted"
+            req["accepted_at"] = now
+            return dict(req)
+
+    async def decline_chat_request(self, request_id: str):
+        with self._lock:
+            req = self._requests.get(request_id)
+            if req and req["status"] == "pending":
+                req["status"] = "declined"
+                req["declined_at"] = _now()
+
+    # ------------------------------------------------------------------
+    # 群组设置
+    # ------------------------------------------------------------------
+    async def get_or_create_group_settings(self, group_id: int, group_name: str = "") -> dict:
+        now = _now()
+        with self._lock:
+            gs = self._groups.get(group_id)
+            if gs is None:
+                gs = self._groups[group_id] = {
+                    "group_id": group_id,
+                    "group_name": group_name or "",
+                    "anti_fraud_enabled": True,
+                    "welcome_enabled": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            elif group_name and gs["group_name"] != group_name:
+                gs["group_name"] = group_name
+                gs["updated_at"] = now
+            return dict(gs)
+
+    async def get_group_settings(self, group_id: int) -> Optional[dict]:
+        with self._lock:
+            gs = self._groups.get(group_id)
+            return dict(gs) if gs else None
+
+    async def update_group_settings(self, group_id: int, fields: dict):
+        with self._lock:
+            gs = self._groups.get(group_id)
+            if gs:
+                for key, value in fields.items():
+                    if key in gs:
+                        gs[key] = value
+                gs["updated_at"] = _now()
+
+    # ------------------------------------------------------------------
+    # NLU 意图缓存
+    # ------------------------------------------------------------------
+    async def get_cached_intent(self, query_hash: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._intents.get(query_hash)
+            if entry is None:
+                return None
+            if entry[0] <= _now():
+                del self._intents[query_hash]
+                return None
+            return copy.deepcopy(entry[1])
+
+    async def save_cached_intent(self, query_hash: str, intent: dict, ttl_seconds: float):
+        with self._lock:
+            self._intents[query_hash] = (
+                _now() + timedelta(seconds=ttl_seconds), copy.deepcopy(intent)
+            )
+
+
+# =============================================================================
+# 当前后端 & 模块级入口
+# =============================================================================
+
+_BACKENDS = {"postgres": PostgresBackend, "memory": MemoryBackend}
+
+
+def _check_api(backend: StorageBackend) -> StorageBackend:
+    """后端须提供 API 中的全部函数（Postgres 后端在 __init__ 中绑定，故检查实例）。"""
+    missing = [name for name in API if not callable(getattr(backend, name, None))]
+    if missing:
+        raise TypeError(f"{type(backend).__name__} 未实现: {missing}")
+    return backend
+
+
+# 导入期检查全部已注册后端，缺函数时启动即失败，而不是在请求中途 AttributeError
+for _cls in _BACKENDS.values():
+    _check_api(_cls())
+
+
+def _make_backend(name: str) -> StorageBackend:
+    try:
+        cls = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的 STORAGE_BACKEND: {name!r}（可选 {', '.join(_BACKENDS)}）") from None
+    return _check_api(cls())
+
+
+_backend: StorageBackend = _make_backend(STORAGE_BACKEND)
+
+
+def get_storage() -> StorageBackend:
+    """当前存储后端。"""
+    return _backend
+
+
+def use_storage(backend) -> StorageBackend:
+    """切换存储后端（传入实例或后端名），返回新后端；压测脚本在两种后端间切换时使用。"""
+    global _backend
+    _backend = _make_backend(backend) if isinstance(backend, str) else _check_api(backend)
+    return _backend
+
+
+def storage_stats() -> dict:
+    return _backend.stats()
+
+
+def unit_of_work():
+    """当前后端的工作单元（Postgres：共用会话与事务；内存：空上下文）。"""
+    return _backend.unit_of_work()
+
+
+def _delegate(name: str):
+    async def call(*args, **kwargs):
+        return await getattr(_backend, name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = getattr(models, name).__doc__
+    return call
+
+
+get_or_create_user = _delegate("get_or_create_user")
+get_credit_score = _delegate("get_credit_score")
+get_collected_ids = _delegate("get_collected_ids")
+update_credit = _delegate("update_credit")
+get_credit_events = _delegate("get_credit_events")
+collect_lantern = _delegate("collect_lantern")
+get_collection_page = _delegate("get_collection_page")
+save_user_preferences = _delegate("save_user_preferences")
+get_user_preferences = _delegate("get_user_preferences")
+assign_recovery_tasks_to_user = _delegate("assign_recovery_tasks_to_user")
+update_recovery_task_progress = _delegate("update_recovery_task_progress")
+try_daily_recovery = _delegate("try_daily_recovery")
+rate_limit_hit = _delegate("rate_limit_hit")
+purge_expired_rate_limits = _delegate("purge_expired_rate_limits")
+log_metric = _delegate("log_metric")
+log_behavior = _delegate("log_behavior")
+get_metric_rollups = _delegate("get_metric_rollups")
+get_metric_totals = _delegate("get_metric_totals")
+create_lantern = _delegate("create_lantern")
+get_lantern_by_id = _delegate("get_lantern_by_id")
+get_lanterns_by_ids = _delegate("get_lanterns_by_ids")
+update_lantern_fields = _delegate("update_lantern_fields")
+report_lantern = _delegate("report_lantern")
+get_lantern_reports = _delegate("get_lantern_reports")
+get_reported_lanterns = _delegate("get_reported_lanterns")
+increment_lantern_views = _delegate("increment_lantern_views")
+claim_moderation_batch = _delegate("claim_moderation_batch")
+release_moderation_claims = _delegate("release_moderation_claims")
+moderate_lanterns = _delegate("moderate_lanterns")
+moderate_claimed_batch = _delegate("moderate_claimed_batch")
+get_pending_lanterns = _delegate("get_pending_lanterns")
+get_lantern_feed = _delegate("get_lantern_feed")
+get_lanterns_by_city = _delegate("get_lanterns_by_city")
+get_approved_lanterns = _delegate("get_approved_lanterns")
+get_lanterns_multi_filter = _delegate("get_lanterns_multi_filter")
+get_lantern_by_prefix = _delegate("get_lantern_by_prefix")
+get_high_trust_lanterns = _delegate("get_high_trust_lanterns")
+create_anonymous_chat = _delegate("create_anonymous_chat")
+get_chat_by_id = _delegate("get_chat_by_id")
+append_message = _delegate("append_message")
+get_recent_chat_messages = _delegate("get_recent_chat_messages")
+mark_photo_shared = _delegate("mark_photo_shared")
+end_chat_naturally = _delegate("end_chat_naturally")
+rate_session = _delegate("rate_session")
+create_chat_request = _delegate("create_chat_request")
+get_chat_request = _delegate("get_chat_request")
+accept_chat_request = _delegate("accept_chat_request")
+decline_chat_request = _delegate("decline_chat_request")
+get_or_create_group_settings = _delegate("get_or_create_group_settings")
+get_group_settings = _delegate("get_group_settings")
+update_group_settings = _delegate("update_group_settings")
+get_cached_intent = _delegate("get_cached_intent")
+save_cached_intent = _delegate("save_cached_intent")
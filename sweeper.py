@@ -0,0 +1,117 @@
+"""
+月影车姬机器人 - 过期数据清理
+YueYingCheJiBot - Expiry Sweeper
+
+匿名会话与会话申请写入了 expires_at，但过期行此前从未被清理，热表与会话
+消息持续增长。本模块提供一个后台清理器：
+  - 每 interval 秒运行一轮，依次执行已注册的清理任务
+  - 每个任务分批调用 sweep_fn(batch_size)，每批是一条独立的短事务
+  - 批次之间休眠 batch_pause 秒，每轮最多 max_batches 批，把删除 I/O 摊开
+  - 每轮记录并输出各任务清理的行数
+
+清理函数（按 expires_at 索引范围扫描、DELETE ... RETURNING 归档）由 models.py 提供。
+依赖：纯 Python 标准库（asyncio）。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ExpirySweeper:
+    """
+    周期性分批清理过期行。
+    某批返回的行数不足 batch_size 即视为该任务已清理干净；达到 max_batches
+    时剩余部分留到下一轮，单轮耗时与 I/O 有上限。stop() 会等待进行中的批次提交。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        batch_pause: float = 0.5,
+        max_batches: int = 100,
+    ):
+        self.name = name
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches = max_batches
+        self._jobs: dict = {}
+        self._task = None
+        self._sweeping = None
+        self._stats = {"runs": 0, "batches": 0, "failed": 0, "swept": {}, "last_run": {}}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register(self, job: str, sweep_fn: Callable[[int], Awaitable[int]]):
+        """注册清理任务：sweep_fn(batch_size) 清理至多 batch_size 行并返回实际行数。"""
+        self._jobs[job] = sweep_fn
+        self._stats["swept"].setdefault(job, 0)
+
+    async def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info("过期清理器 %s 已启动（间隔 %.0fs）", self.name, self.interval)
+
+    async def stop(self):
+        """停止后台协程；进行中的批次完成提交后再返回。"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sweeping and not self._sweeping.done():
+            await self._sweeping
+        logger.info("过期清理器 %s 已停止，统计：%s", self.name, self.stats())
+
+    async def run_once(self) -> dict:
+        """执行一轮清理，返回 {任务名: 本轮清理行数}。"""
+        started = time.monotonic()
+        swept = {}
+        for job, sweep_fn in self._jobs.items():
+            swept[job] = await self._sweep_job(job, sweep_fn)
+        self._stats["runs"] += 1
+        self._stats["last_run"] = swept
+        if any(swept.values()):
+            logger.info(
+                "过期清理器 %s 本轮清理 %s（耗时 %.1fs）",
+                self.name, swept, time.monotonic() - started,
+            )
+        return swept
+
+    def stats(self) -> dict:
+        return {**self._stats, "swept": dict(self._stats["swept"])}
+
+    async def _sweep_job(self, job: str, sweep_fn) -> int:
+        total = 0
+        for i in range(self.max_batches):
+            if i:
+                await asyncio.sleep(self.batch_pause)
+            # shield：停止时不打断进行中的事务，由 stop() 等待其完成
+            self._sweeping = asyncio.ensure_future(sweep_fn(self.batch_size))
+            try:
+                rows = await asyncio.shield(self._sweeping)
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("过期清理器 %s 任务 %s 执行失败: %s", self.name, job, e)
+                break
+            self._stats["batches"] += 1
+            total += rows
+            self._stats["swept"][job] += rows
+            if rows < self.batch_size:
+                break
+        return total
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
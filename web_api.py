@@ -3,7 +3,8 @@
 YueYingCheJiBot - Web API for Mini App
 
 提供 Mini App 所需的 REST API 端点：
-  GET  /api/lanterns  — 获取已审核灯笼列表
+  GET  /api/lanterns  — 获取已审核灯笼列表（游标分页）
+  GET  /api/collection — 获取用户时光秘匣（游标分页）
   GET  /api/credit    — 获取用户信用分
   POST /api/collect   — 收藏灯笼到时光秘匣
   GET  /mini_app.html — 返回 Mini App 页面
@@ -13,17 +14,19 @@ YueYingCheJiBot - Web API for Mini App
 """
 
 import os
-import json
 import hmac
 import hashlib
 import logging
 from pathlib import Path
 from aiohttp import web
-from models import (
+
+import jsoncodec
+from models import acting_user
+from storage import (
     get_or_create_user,
     collect_lantern,
-    get_lanterns_by_city,
-    get_approved_lanterns,
+    get_collection_page,
+    get_lantern_feed,
 )
 
 logger = logging.getLogger(__name__)
@@ -58,10 +61,26 @@ async def handle_mini_app(request: web.Request) -> web.Response:
     return web.FileResponse(html_path)
 
 
+def _page_params(request: web.Request, default_limit: int) -> tuple:
+    """解析分页参数 (cursor, limit)。"""
+    cursor = request.rel_url.query.get("cursor") or None
+    try:
+        limit = int(request.rel_url.query.get("limit", default_limit))
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid limit")
+    return cursor, limit
+
+
+def _json(data, status: int = 200) -> web.Response:
+    """JSON 响应（jsoncodec 编码，datetime 原生输出为 ISO 字符串）。"""
+    return web.json_response(data, status=status, dumps=jsoncodec.dumps)
+
+
 async def handle_lanterns(request: web.Request) -> web.Response:
     """
-    GET /api/lanterns?city=台北&init_data=...
-    返回已审核灯笼列表（JSON）。
+    GET /api/lanterns?city=台北&cursor=...&limit=100&init_data=...
+    返回已审核灯笼摘要（新 → 旧）：{"items": [...], "next_cursor": "..." | null}。
+    description 仅含前 80 字，举报只给 report_count。next_cursor 非空时带上它请求下一页。
     """
     # 开发模式下跳过验证；生产环境始终验证
     if os.environ.get("ENV") != "dev":
@@ -70,12 +89,12 @@ async def handle_lanterns(request: web.Request) -> web.Response:
             raise web.HTTPForbidden(reason="Invalid Telegram initData")
 
     city = request.rel_url.query.get("city", "")
-    limit = min(int(request.rel_url.query.get("limit", "100")), 200)
-
-    if city:
-        lanterns = await get_lanterns_by_city(city, limit=limit)
-    else:
-        lanterns = await get_approved_lanterns(limit=limit)
+    cursor, limit = _page_params(request, 100)
+    try:
+        page = await get_lantern_feed(city=city, cursor=cursor, limit=limit)
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid cursor")
+    lanterns = page["items"]
 
     # 为每个灯笼添加模糊坐标（真实坐标不存储，前端负责模糊化）
     city_coords = {
@@ -93,16 +112,34 @@ async def handle_lanterns(request: web.Request) -> web.Response:
         lat, lng = city_coords.get(c, (23.5, 121.0))
         l["lat"] = lat
         l["lng"] = lng
-        # 转换 datetime 为字符串
-        if "submitted_at" in l and l["submitted_at"] is not None:
-            l["submitted_at"] = l["submitted_at"].isoformat()
-        if "updated_at" in l and l["updated_at"] is not None:
-            l["updated_at"] = l["updated_at"].isoformat()
 
-    return web.Response(
-        text=json.dumps(lanterns, ensure_ascii=False),
-        content_type="application/json",
-    )
+    return _json(page)
+
+
+async def handle_collection(request: web.Request) -> web.Response:
+    """
+    GET /api/collection?user_id=123&cursor=...&limit=20&init_data=...
+    返回用户时光秘匣（按收藏先后）：
+    {"items": [...], "missing": [...], "next_cursor": "..." | null, "total": n}。
+    """
+    if os.environ.get("ENV") != "dev":
+        init_data = request.rel_url.query.get("init_data", "")
+        if not verify_telegram_data(init_data):
+            raise web.HTTPForbidden(reason="Invalid Telegram initData")
+
+    try:
+        user_id = int(request.rel_url.query["user_id"])
+    except (KeyError, ValueError):
+        raise web.HTTPBadRequest(reason="Missing or invalid user_id")
+
+    cursor, limit = _page_params(request, 20)
+    try:
+        with acting_user(user_id):
+            page = await get_collection_page(user_id, cursor=cursor, limit=limit)
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Invalid cursor")
+    page.pop("ids")
+    return _json(page)
 
 
 async def handle_credit(request: web.Request) -> web.Response:
@@ -120,18 +157,19 @@ async def handle_credit(request: web.Request) -> web.Response:
     except (KeyError, ValueError):
         raise web.HTTPBadRequest(reason="Missing or invalid user_id")
 
-    user = await get_or_create_user(user_id)
-    return web.json_response({"credit": user.get("credit_score", 0)})
+    with acting_user(user_id):
+        user = await get_or_create_user(user_id)
+    return _json({"credit": user.get("credit_score", 0)})
 
 
 async def handle_collect(request: web.Request) -> web.Response:
     """
     POST /api/collect
     Body: {"user_id": 123, "lantern_id": "...", "init_data": "..."}
-    收藏灯笼到用户时光秘匣。
+    收藏灯笼到用户时光秘匣（幂等）；collected 表示本次是否为新收藏。
     """
     try:
-        body = await request.json()
+        body = await request.json(loads=jsoncodec.loads)
     except Exception:
         raise web.HTTPBadRequest(reason="Invalid JSON body")
 
@@ -144,8 +182,10 @@ async def handle_collect(request: web.Request) -> web.Response:
     if not user_id or not lantern_id:
         raise web.HTTPBadRequest(reason="Missing user_id or lantern_id")
 
-    await collect_lantern(int(user_id), lantern_id)
-    return web.json_response({"ok": True, "message": "已收藏到你的时光秘匣 🕰"})
+    with acting_user(int(user_id)):
+        added = await collect_lantern(int(user_id), lantern_id)
+    message = "已收藏到你的时光秘匣 🕰" if added else "这盏灯笼已在你的时光秘匣中 🕰"
+    return _json({"ok": True, "collected": added, "message": message})
 
 
 # ── App 工厂 ────────────────────────────────────────────────────────────────
@@ -156,6 +196,7 @@ def create_web_app() -> web.Application:
     app.router.add_get("/", handle_mini_app)
     app.router.add_get("/mini_app.html", handle_mini_app)
     app.router.add_get("/api/lanterns", handle_lanterns)
+    app.router.add_get("/api/collection", handle_collection)
     app.router.add_get("/api/credit", handle_credit)
     app.router.add_post("/api/collect", handle_collect)
     return app
@@ -0,0 +1,253 @@
+"""
+月影车姬机器人 - 后台批量写入
+YueYingCheJiBot - Write-Behind Buffers
+
+把高频、可容忍短暂延迟的写入移出用户请求的关键路径：
+  - BatchWriter       — 有界队列 + 后台刷写协程，按条数或时间间隔批量写库
+  - CounterAggregator — 内存累加计数增量，定期合并为一条批量 UPDATE
+
+调用方只负责入队（不等待数据库），刷写函数由 models.py 提供。
+依赖：纯 Python 标准库（asyncio）。
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# 队列满时的处理策略
+DROP_NEWEST = "drop_newest"   # 丢弃新入队的条目（默认，调用方永不阻塞）
+DROP_OLDEST = "drop_oldest"   # 丢弃队首最旧的条目，为新条目腾出位置
+BLOCK = "block"               # 调用方等待队列腾出空间（背压）
+
+
+class BatchWriter:
+    """
+    有界异步批量写入器。
+    enqueue() 非阻塞入队；后台协程在攒满 batch_size 条或距首条入队超过
+    flush_interval 秒时调用 flush_fn(batch) 批量写入。stop() 会刷完剩余条目。
+    未 start() 时 submit() 直接同步写入，保持旧行为。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[list], Awaitable[None]],
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        policy: str = DROP_NEWEST,
+    ):
+        self.name = name
+        self._flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+        self._stopping = False
+        self._batch: list = []
+        self._flushing = None
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, item) -> bool:
+        """非阻塞入队。队列满时按策略丢弃，返回本条是否入队成功。"""
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if self.policy != DROP_OLDEST:
+                self._stats["dropped"] += 1
+                return False
+            try:
+                self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self._stats["dropped"] += 1
+            self._queue.put_nowait(item)
+        self._stats["enqueued"] += 1
+        return True
+
+    async def submit(self, item):
+        """入队（供 async 调用方使用）。BLOCK 策略下队列满时等待；未启动时直接写入。"""
+        if not self.running:
+            await self._flush([item])
+            return
+        if self.policy == BLOCK:
+            await self._queue.put(item)
+            self._stats["enqueued"] += 1
+        else:
+            self.enqueue(item)
+
+    async def start(self):
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logger.info("批量写入器 %s 已启动", self.name)
+
+    async def stop(self):
+        """停止后台协程并刷写所有剩余条目。"""
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing and not self._flushing.done():
+            await self._flushing
+        remaining, self._batch = self._batch, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for i in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[i:i + self.batch_size])
+        logger.info("批量写入器 %s 已停止，统计：%s", self.name, self._stats)
+
+    def stats(self) -> dict:
+        return {**self._stats, "queued": self._queue.qsize()}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        # Python 3.11 的 wait_for 在内层 get() 恰好完成时会吞掉 cancel()，
+        # 协程随后阻塞在 get() 上使 stop() 永远等待；因此同时检查 _stopping
+        while not self._stopping:
+            self._batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size and not self._stopping:
+                try:
+                    self._batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            # shield：停止时不打断进行中的写入，由 stop() 等待其完成
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+
+    async def _flush(self, batch: list):
+        if not batch:
+            return
+        try:
+            await self._flush_fn(batch)
+            self._stats["flushed"] += len(batch)
+            self._stats["batches"] += 1
+        except Exception as e:
+            self._stats["failed"] += len(batch)
+            logger.error("批量写入器 %s 写入 %d 条失败: %s", self.name, len(batch), e)
+
+
+class CounterAggregator:
+    """
+    计数增量聚合器（write-behind）。
+    add() 在内存中按 key 累加增量；后台协程每 flush_interval 秒（或待写 key 数
+    达到 max_keys 时提前）调用一次 flush_fn({key: delta})。写入失败的增量会合并回
+    待写区，下次重试。flush_interval 即可能丢失的最长计数窗口（进程崩溃时）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[dict], Awaitable[None]],
+        flush_interval: float = 5.0,
+        max_keys: int = 10_000,
+    ):
+        self.name = name
+        self._flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self._pending: dict = {}
+        self._full = asyncio.Event()
+        self._task = None
+        self._stopping = False
+        self._flushing = None
+        self._stats = {"flushed_keys": 0, "flushed_delta": 0, "flushes": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add(self, key, delta: int = 1):
+        """累加一个增量（非阻塞）。"""
+        self._pending[key] = self._pending.get(key, 0) + delta
+        if len(self._pending) >= self.max_keys:
+            self._full.set()
+
+    async def submit(self, key, delta: int = 1):
+        """累加增量；未启动时直接写入，保持旧行为。"""
+        if self.running:
+            self.add(key, delta)
+        else:
+            await self._flush_fn({key: delta})
+
+    async def start(self):
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logger.info("计数聚合器 %s 已启动（刷写间隔 %.1fs）", self.name, self.flush_interval)
+
+    async def stop(self):
+        """停止后台协程并写入全部待写增量。"""
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing and not self._flushing.done():
+            await self._flushing
+        await self.flush()
+        logger.info("计数聚合器 %s 已停止，统计：%s", self.name, self._stats)
+
+    async def flush(self):
+        """立即写入当前全部待写增量。"""
+        deltas, self._pending = self._pending, {}
+        self._full.clear()
+        if not deltas:
+            return
+        try:
+            await self._flush_fn(deltas)
+            self._stats["flushes"] += 1
+            self._stats["flushed_keys"] += len(deltas)
+            self._stats["flushed_delta"] += sum(deltas.values())
+        except Exception as e:
+            self._stats["failed"] += 1
+            for key, delta in deltas.items():
+                self._pending[key] = self._pending.get(key, 0) + delta
+            logger.error("计数聚合器 %s 写入 %d 个 key 失败，保留待重试: %s", self.name, len(deltas), e)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "pending_keys": len(self._pending),
+            "pending_delta": sum(self._pending.values()),
+        }
+
+    async def _run(self):
+        # 同 BatchWriter._run：cancel() 可能被 wait_for 吞掉
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flushing = asyncio.ensure_future(self.flush())
+            await asyncio.shield(self._flushing)